@@ -151,7 +151,22 @@ GO
 CREATE INDEX IDX_StudentCourse_StudentID ON StudentCourse(StudentID);
 CREATE INDEX IDX_StudentCourse_CourseID ON StudentCourse(CourseID);
 CREATE INDEX IDX_Grade_StudentID ON Grade(StudentID);
-CREATE INDEX IDX_CourseSchedule_CourseID ON CourseSchedule(CourseID);
+
+-- Covering indexes from migration 1 (SQLQueryǨ001_.sql); see that script for the queries each one serves
+CREATE INDEX IX_Grade_CourseID ON Grade(CourseID) INCLUDE (Grade, Point);
+CREATE INDEX IX_Student_ClassID ON Student(ClassID) INCLUDE (StudentName, TotalGPA);
+CREATE INDEX IX_Student_UserID ON Student(UserID);
+CREATE INDEX IX_CourseSchedule_CourseID_Cover ON CourseSchedule(CourseID)
+    INCLUDE (TeacherID, ClassRoomID, WeekDay, StartTime, EndTime);
+
+-- Schema version: a new database already includes migration 1, so the migration script skips it
+CREATE TABLE SchemaVersion (
+    Version INT PRIMARY KEY,
+    Description VARCHAR(200) NOT NULL,
+    AppliedAt DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+);
+INSERT INTO SchemaVersion (Version, Description) VALUES (1, 'Covering indexes for main_window queries and GPA triggers');
+GO
 
 -- Triggers (optimized and kept essential ones)
 
@@ -0,0 +1,14 @@
+-- File: change_tracking.sql
+-- Functionality: Enables SQL Server Change Tracking on the tables polled by change_feed.py, so open tabs can refresh only the changed rows.
+
+USE SchoolDB2;
+GO
+
+ALTER DATABASE SchoolDB2
+SET CHANGE_TRACKING = ON (CHANGE_RETENTION = 2 DAYS, AUTO_CLEANUP = ON);
+GO
+
+ALTER TABLE Grade ENABLE CHANGE_TRACKING;
+ALTER TABLE Student ENABLE CHANGE_TRACKING;
+ALTER TABLE StudentCourse ENABLE CHANGE_TRACKING;
+GO
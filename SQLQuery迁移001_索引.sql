@@ -0,0 +1,60 @@
+-- File: migration_001_indexes.sql
+-- Functionality: Versioned migration 1. Adds covering indexes for the queries issued by main_window.py and the GPA triggers.
+-- Safe to re-run: it is skipped once SchemaVersion records version 1, and every index is created only if missing.
+-- The TotalGPA subquery in the Grade/Course triggers filters Grade by StudentID, which already seeks the
+-- clustered primary key (StudentID, CourseID); its per-course path is served by IX_Grade_CourseID below.
+-- There is no USE statement: run it against the database to migrate, e.g.
+--   sqlcmd -E -S . -d SchoolDB2 -i <this script>
+-- Databases created with the current schema script already contain these indexes and record version 1.
+
+SET XACT_ABORT ON;
+GO
+
+IF OBJECT_ID('dbo.SchemaVersion', 'U') IS NULL
+    CREATE TABLE SchemaVersion (
+        Version INT PRIMARY KEY,
+        Description VARCHAR(200) NOT NULL,
+        AppliedAt DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+    );
+GO
+
+IF NOT EXISTS (SELECT 1 FROM SchemaVersion WHERE Version = 1)
+BEGIN
+    BEGIN TRY
+        BEGIN TRANSACTION;
+
+        -- Grade by CourseID: course overview join, Grade -> Course joins,
+        -- and the per-course GPA recalculation in TRG_Course_Update_SyncGPA.
+        -- StudentID is carried as the clustering key.
+        IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Grade_CourseID' AND object_id = OBJECT_ID('Grade'))
+            CREATE INDEX IX_Grade_CourseID ON Grade(CourseID) INCLUDE (Grade, Point);
+
+        -- Student by ClassID: class status join and class-scoped refresh.
+        IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Student_ClassID' AND object_id = OBJECT_ID('Student'))
+            CREATE INDEX IX_Student_ClassID ON Student(ClassID) INCLUDE (StudentName, TotalGPA);
+
+        -- Student by UserID: login lookup of the StudentID.
+        IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Student_UserID' AND object_id = OBJECT_ID('Student'))
+            CREATE INDEX IX_Student_UserID ON Student(UserID);
+
+        -- CourseSchedule by CourseID, covering the enrolled-course, conflict-check and export queries
+        -- (they read TeacherID/ClassRoomID for the Teacher/ClassRoom joins plus the time columns).
+        -- It supersedes IDX_CourseSchedule_CourseID.
+        IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_CourseSchedule_CourseID_Cover' AND object_id = OBJECT_ID('CourseSchedule'))
+            CREATE INDEX IX_CourseSchedule_CourseID_Cover ON CourseSchedule(CourseID)
+                INCLUDE (TeacherID, ClassRoomID, WeekDay, StartTime, EndTime);
+        IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IDX_CourseSchedule_CourseID' AND object_id = OBJECT_ID('CourseSchedule'))
+            DROP INDEX IDX_CourseSchedule_CourseID ON CourseSchedule;
+
+        INSERT INTO SchemaVersion (Version, Description) VALUES (1, 'Covering indexes for main_window queries and GPA triggers');
+
+        COMMIT TRANSACTION;
+    END TRY
+    BEGIN CATCH
+        -- Any failed CREATE/DROP INDEX rolls back the whole migration, so version 1 is never recorded without its indexes
+        IF @@TRANCOUNT > 0
+            ROLLBACK TRANSACTION;
+        THROW;
+    END CATCH
+END
+GO
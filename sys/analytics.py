@@ -0,0 +1,185 @@
+# File: analytics.py
+# Functionality: 将 Grade、Student、Class、Course 等表一次性载入 pandas 列式快照，以向量化分组计算各类统计报表，并按变更行键增量刷新快照
+
+import numpy as np
+import pandas as pd
+
+from db_utils import chunks, db_query_all, db_stream_columns
+
+GPA_BINS = [0, 1, 2, 3, 4, 5]
+GPA_BIN_LABELS = ["0-1", "1-2", "2-3", "3-4", "4+"]
+
+def _typed(df, numeric):
+    for col in numeric:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    return df
+
+def _frame(rows, columns, numeric=(), index=None):
+    df = _typed(pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns), numeric)
+    return df.set_index(index) if index else df
+
+def _load_frame(query, columns, numeric=(), index=None):
+    """按 fetchmany 批次以列的形式构建 DataFrame，不经过整表的行列表"""
+    parts = [_typed(pd.DataFrame(dict(zip(columns, batch.columns))), numeric)
+             for batch in db_stream_columns(query)]
+    df = pd.concat(parts, ignore_index=True) if parts else _typed(pd.DataFrame(columns=columns), numeric)
+    return df.set_index(index) if index else df
+
+def _to_rows(df):
+    """DataFrame -> 行列表，NaN 转为 None，浮点数保留两位小数"""
+    df = df.round(2).astype(object)
+    return df.where(df.notna(), None).values.tolist()
+
+class AnalyticsSnapshot:
+    """In-memory columnar copy of the grade-related tables; every report is a vectorized group-by over it."""
+
+    def __init__(self):
+        self.reload()
+
+    def reload(self):
+        """Full load; Class/Course/Department changes are only picked up here."""
+        self.grade = _load_frame("SELECT StudentID, CourseID, Grade, Point FROM Grade",
+                                 ["StudentID", "CourseID", "Grade", "Point"], ("Grade", "Point"), ["StudentID", "CourseID"])
+        self.student = _load_frame("SELECT StudentID, StudentName, ClassID, TotalGPA FROM Student",
+                                   ["StudentID", "StudentName", "ClassID", "TotalGPA"], ("TotalGPA",), "StudentID")
+        self.enroll = _load_frame("SELECT StudentID, CourseID FROM StudentCourse",
+                                  ["StudentID", "CourseID"], index=["StudentID", "CourseID"])
+        self.classes = _load_frame(
+            "SELECT c.ClassID, c.ClassName, c.DeptID, d.DeptName "
+            "FROM Class c LEFT JOIN Department d ON c.DeptID = d.DeptID",
+            ["ClassID", "ClassName", "DeptID", "DeptName"], index="ClassID")
+        self.course = _load_frame("SELECT CourseID, CourseName, CourseType, Credits FROM Course",
+                                  ["CourseID", "CourseName", "CourseType", "Credits"], ("Credits",), "CourseID")
+
+    # --- 增量刷新 ---
+    def apply_changes(self, changes):
+        """Applies [(table, op, key), ...] from change_feed: refetches changed Grade/Student rows, patches StudentCourse keys."""
+        grade_keys, students = set(), set()
+        enroll_added, enroll_deleted = set(), set()
+        for table, op, key in changes:
+            if table == "Grade":
+                grade_keys.add(key)
+            elif table == "Student":
+                students.add(key[0])
+            elif table == "StudentCourse":
+                if op == "D":
+                    enroll_added.discard(key)
+                    enroll_deleted.add(key)
+                else:
+                    enroll_deleted.discard(key)
+                    enroll_added.add(key)
+
+        if grade_keys:
+            keys = sorted(grade_keys)
+            fresh = []
+            for chunk in chunks(keys, 1000):
+                fresh.extend(db_query_all(
+                    "SELECT g.StudentID, g.CourseID, g.Grade, g.Point FROM Grade g "
+                    "INNER JOIN (VALUES " + ", ".join(["(?, ?)"] * len(chunk)) + ") AS k(StudentID, CourseID) "
+                    "ON k.StudentID = g.StudentID AND k.CourseID = g.CourseID",
+                    [value for key in chunk for value in key]
+                ))
+            # 先删除所有变更键，再追加仍存在的行，已删除的行自然消失
+            self.grade = pd.concat([
+                self.grade.drop(pd.MultiIndex.from_tuples(keys), errors="ignore"),
+                _frame(fresh, ["StudentID", "CourseID", "Grade", "Point"], ("Grade", "Point"), ["StudentID", "CourseID"]),
+            ])
+
+        if students:
+            ids = sorted(students)
+            fresh = []
+            for chunk in chunks(ids, 1000):
+                fresh.extend(db_query_all(
+                    "SELECT StudentID, StudentName, ClassID, TotalGPA FROM Student WHERE StudentID IN ("
+                    + ", ".join(["?"] * len(chunk)) + ")", chunk
+                ))
+            self.student = pd.concat([
+                self.student.drop(ids, errors="ignore"),
+                _frame(fresh, ["StudentID", "StudentName", "ClassID", "TotalGPA"], ("TotalGPA",), "StudentID"),
+            ])
+
+        if enroll_added or enroll_deleted:
+            kept = self.enroll.drop(pd.MultiIndex.from_tuples(sorted(enroll_added | enroll_deleted)), errors="ignore")
+            added = pd.DataFrame(index=pd.MultiIndex.from_tuples(sorted(enroll_added), names=["StudentID", "CourseID"])) \
+                if enroll_added else None
+            self.enroll = pd.concat([kept, added]) if added is not None else kept
+
+    # --- 报表 ---
+    def _graded(self):
+        """成绩行附加班级、院系与课程类型"""
+        g = self.grade.reset_index()
+        g = g.join(self.student[["ClassID"]], on="StudentID")
+        g = g.join(self.classes[["DeptID", "DeptName"]], on="ClassID")
+        g = g.join(self.course[["CourseType"]], on="CourseID")
+        g["Passed"] = g["Grade"] >= 60
+        g["Failed"] = g["Grade"] < 60
+        return g
+
+    @staticmethod
+    def _pass_rate(passed, graded):
+        """与 SQL 一致：CAST(100.0 * 及格数 / 成绩数 AS INT)，无成绩时为 0"""
+        rate = np.floor(100.0 * passed / graded.where(graded > 0))
+        return rate.fillna(0).astype(int)
+
+    def class_status(self):
+        g = self._graded()
+        agg = g.groupby("ClassID").agg(AvgScore=("Grade", "mean"), Graded=("StudentID", "size"), Passed=("Passed", "sum"))
+        df = self.classes.join(self.student.groupby("ClassID").size().rename("StudentCount")).join(agg)
+        df["StudentCount"] = df["StudentCount"].fillna(0).astype(int)
+        df["PassRate"] = self._pass_rate(df["Passed"], df["Graded"].fillna(0))
+        headers = ["ClassID", "ClassName", "DepartmentName", "人数", "平均成绩", "及格率"]
+        return headers, _to_rows(df.reset_index()[["ClassID", "ClassName", "DeptName", "StudentCount", "AvgScore", "PassRate"]])
+
+    def course_overview(self):
+        # 仅统计已选课学生的成绩，与原查询的 JOIN 条件一致
+        g = self.grade.join(self.enroll, how="inner").reset_index()
+        g["Passed"] = g["Grade"] >= 60
+        g["Failed"] = g["Grade"] < 60
+        agg = g.groupby("CourseID").agg(AvgScore=("Grade", "mean"), Graded=("StudentID", "size"),
+                                        Passed=("Passed", "sum"), RetakeCount=("Failed", "sum"))
+        enrolled = self.enroll.reset_index().groupby("CourseID")["StudentID"].nunique().rename("StudentCount")
+        df = self.course[["CourseName"]].join(enrolled).join(agg)
+        df["StudentCount"] = df["StudentCount"].fillna(0).astype(int)
+        df["RetakeCount"] = df["RetakeCount"].fillna(0).astype(int)
+        df["PassRate"] = self._pass_rate(df["Passed"], df["Graded"].fillna(0))
+        headers = ["CourseID", "CourseName", "选课人数", "平均分", "及格率", "重修人数"]
+        return headers, _to_rows(df.reset_index()[["CourseID", "CourseName", "StudentCount", "AvgScore", "PassRate", "RetakeCount"]])
+
+    def _students_with_dept(self):
+        s = self.student.join(self.classes, on="ClassID", how="inner")
+        s["TotalGPA"] = s["TotalGPA"].fillna(0)
+        return s
+
+    def gpa_ranking(self):
+        s = self._students_with_dept()
+        s = s.join(self.grade.groupby(level="StudentID")["Grade"].mean().rename("AvgGrade"))
+        s["AvgGrade"] = s["AvgGrade"].fillna(0)
+        s["DeptRank"] = s.groupby("DeptID")["TotalGPA"].rank(method="min", ascending=False).astype(int)
+        s["Percentile"] = s.groupby("DeptID")["TotalGPA"].rank(pct=True) * 100
+        s = s.reset_index().sort_values(["DeptID", "DeptRank"])
+        headers = ["DeptID", "系名称", "学生ID", "学生姓名", "班级", "总绩点", "平均分", "系内排名", "百分位"]
+        return headers, _to_rows(s[["DeptID", "DeptName", "StudentID", "StudentName", "ClassName",
+                                    "TotalGPA", "AvgGrade", "DeptRank", "Percentile"]])
+
+    def gpa_distribution(self):
+        s = self._students_with_dept()
+        bins = pd.cut(s["TotalGPA"], GPA_BINS, labels=GPA_BIN_LABELS, right=False, include_lowest=True)
+        table = pd.crosstab(s["DeptName"], bins).reindex(columns=GPA_BIN_LABELS, fill_value=0)
+        table["人数"] = table.sum(axis=1)
+        table["平均绩点"] = s.groupby("DeptName")["TotalGPA"].mean()
+        return ["系名称"] + GPA_BIN_LABELS + ["人数", "平均绩点"], _to_rows(table.reset_index())
+
+    def fail_rate(self):
+        """不及格率（%）按院系 × 课程类型；表中没有学期字段，无法按时间给出趋势"""
+        g = self._graded().dropna(subset=["Grade"])
+        table = pd.pivot_table(g, values="Failed", index="DeptName", columns="CourseType", aggfunc="mean") * 100
+        table["总体"] = g.groupby("DeptName")["Failed"].mean() * 100
+        return ["系名称"] + [str(c) for c in table.columns], _to_rows(table.reset_index())
+
+REPORTS = {
+    "班级情况": AnalyticsSnapshot.class_status,
+    "选课总览": AnalyticsSnapshot.course_overview,
+    "绩点排名与百分位": AnalyticsSnapshot.gpa_ranking,
+    "绩点分布": AnalyticsSnapshot.gpa_distribution,
+    "不及格率": AnalyticsSnapshot.fail_rate,
+}
@@ -0,0 +1,81 @@
+# File: bench_db_stream.py
+# Functionality: 对比 fetchall 与流式读取（db_stream / db_iter / db_stream_columns）扫描 Grade 表时的峰值内存与首行耗时
+
+import argparse
+import time
+import tracemalloc
+
+from db_utils import db_query_all, db_stream, db_iter, db_stream_columns, DEFAULT_BATCH_SIZE
+
+# 以交叉连接复制 Grade 的行，无需向库中写入数据即可得到指定行数的扫描
+SCAN_QUERY = """
+    SELECT TOP ({rows}) g.StudentID, g.CourseID, g.Grade, g.Point
+    FROM Grade g CROSS JOIN sys.all_objects a CROSS JOIN sys.all_objects b
+"""
+
+def _measure(name, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count, first_row_at = func(start)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28}{count:>10}{elapsed:>10.2f}{first_row_at:>12.3f}{peak / 2**20:>12.1f}")
+
+def fetchall_copy(query):
+    """原有写法：fetchall 后再复制为列表"""
+    def run(start):
+        rows = db_query_all(query)
+        first_row_at = time.perf_counter() - start
+        data = [list(row) for row in rows]
+        return len(data), first_row_at
+    return run
+
+def iter_copy(query, batch_size):
+    """表格载入：db_iter 逐行转换为列表"""
+    def run(start):
+        data = []
+        first_row_at = None
+        for row in db_iter(query, batch_size=batch_size):
+            if first_row_at is None:
+                first_row_at = time.perf_counter() - start
+            data.append(list(row))
+        return len(data), first_row_at or 0.0
+    return run
+
+def stream_scan(query, batch_size):
+    """导出：db_stream 逐批处理，不保留结果"""
+    def run(start):
+        count = 0
+        first_row_at = None
+        for rows in db_stream(query, batch_size=batch_size):
+            if first_row_at is None:
+                first_row_at = time.perf_counter() - start
+            count += len(rows)
+        return count, first_row_at or 0.0
+    return run
+
+def column_scan(query, batch_size):
+    """统计：db_stream_columns 逐批按列处理"""
+    def run(start):
+        count = 0
+        first_row_at = None
+        for batch in db_stream_columns(query, batch_size=batch_size):
+            if first_row_at is None:
+                first_row_at = time.perf_counter() - start
+            count += len(batch.columns[0])
+        return count, first_row_at or 0.0
+    return run
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grade 扫描内存基准")
+    parser.add_argument("--rows", type=int, default=5000000, help="扫描行数")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="fetchmany 批大小")
+    args = parser.parse_args()
+
+    query = SCAN_QUERY.format(rows=args.rows)
+    print(f"{'方式':<28}{'行数':>10}{'总耗时s':>10}{'首行耗时s':>12}{'峰值MiB':>12}")
+    _measure("fetchall + list copy", fetchall_copy(query))
+    _measure("db_iter + list copy", iter_copy(query, args.batch_size))
+    _measure("db_stream scan", stream_scan(query, args.batch_size))
+    _measure("db_stream_columns scan", column_scan(query, args.batch_size))
@@ -0,0 +1,106 @@
+# File: bench_enrolled_refresh.py
+# Functionality: 以桩查询填充 200 行已选课程，对比委托绘制导航按钮与原先每行 setCellWidget 创建 QPushButton 的刷新耗时，无需连接数据库；
+#                委托刷新超出预算或不明显快于基线时以非零状态退出
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QPushButton
+
+import main_window
+from main_window import MainWindow
+from ui_utils import ButtonDelegate
+
+BUILDINGS = ["实验楼", "教一楼", "教二楼"]
+
+# 每 200 行的刷新预算（毫秒），以及委托刷新相对 setCellWidget 至少应快的倍数
+BUDGET_MS_PER_200_ROWS = 30.0
+MIN_SPEEDUP = 3.0
+
+def stub_rows(count):
+    """模拟 ENROLLED_COURSES_QUERY 的结果行"""
+    return [
+        (f"课程{i}", f"星期{i % 7 + 1}", "08:00", "09:40", BUILDINGS[i % len(BUILDINGS)], f"教师{i % 30}")
+        for i in range(count)
+    ]
+
+def make_table():
+    table = QTableWidget()
+    headers = ["课程名称", "上课时间", "教室", "教师", "操作"]
+    table.setColumnCount(len(headers))
+    table.setHorizontalHeaderLabels(headers)
+    return table
+
+class DelegateHost:
+    """只带已选课程表的 MainWindow 替身，刷新方法直接取自 MainWindow"""
+    refresh_enrolled_courses = MainWindow.refresh_enrolled_courses
+    append_enrolled_rows = MainWindow.append_enrolled_rows
+
+    def __init__(self):
+        self.student_id = "S0001"
+        self.enrolled_table = make_table()
+        self.nav_delegate = ButtonDelegate("📍 导航", "#2ecc71", self.enrolled_table)
+        self.enrolled_table.setItemDelegateForColumn(4, self.nav_delegate)
+
+def cell_widget_refresh(table, rows):
+    """原有写法：逐行 setItem，并为每行创建一个导航按钮"""
+    table.setRowCount(0)
+    for row in rows:
+        course_name, day, start, end, building, teacher = row
+        i = table.rowCount()
+        table.insertRow(i)
+        table.setItem(i, 0, QTableWidgetItem(str(course_name)))
+        table.setItem(i, 1, QTableWidgetItem(f"{day} {start}-{end}" if day else "时间未定"))
+        table.setItem(i, 2, QTableWidgetItem(f"{building}" if building else "地点未定"))
+        table.setItem(i, 3, QTableWidgetItem(str(teacher) if teacher else "未知"))
+        table.setCellWidget(i, 4, QPushButton("📍 导航"))
+
+def _measure(name, func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        QApplication.processEvents()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    median_ms = times[len(times) // 2] * 1000
+    print(f"{name:<36}{median_ms:>10.1f}{times[0] * 1000:>10.1f}")
+    return median_ms
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="已选课程表刷新耗时")
+    parser.add_argument("--rows", type=int, default=200, help="已选课程行数")
+    parser.add_argument("--repeat", type=int, default=20, help="重复次数，取中位数")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS_PER_200_ROWS, help="每 200 行的刷新预算（毫秒）")
+    parser.add_argument("--min-speedup", type=float, default=MIN_SPEEDUP, help="相对 setCellWidget 的最小加速比")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    rows = stub_rows(args.rows)
+    # 以桩函数替换 refresh_enrolled_courses 中的数据库查询
+    main_window.db_query_all = lambda query, params=(): rows
+
+    host = DelegateHost()
+    host.enrolled_table.show()
+    baseline = make_table()
+    baseline.show()
+
+    print(f"{'方式':<36}{'中位ms':>10}{'最快ms':>10}")
+    delegate_ms = _measure("refresh_enrolled_courses (委托)", host.refresh_enrolled_courses, args.repeat)
+    widget_ms = _measure("setCellWidget + QPushButton", lambda: cell_widget_refresh(baseline, rows), args.repeat)
+
+    failures = []
+    if host.enrolled_table.rowCount() != args.rows:
+        failures.append(f"已选课程表行数 {host.enrolled_table.rowCount()}，应为 {args.rows}")
+    budget_ms = args.budget_ms * args.rows / 200
+    if delegate_ms > budget_ms:
+        failures.append(f"委托刷新 {delegate_ms:.1f}ms 超出预算 {budget_ms:.1f}ms")
+    if delegate_ms * args.min_speedup > widget_ms:
+        failures.append(f"委托刷新 {delegate_ms:.1f}ms 未达到 setCellWidget {widget_ms:.1f}ms 的 {args.min_speedup:g} 倍速度")
+    for msg in failures:
+        print(f"失败 {msg}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,259 @@
+# File: bench_query_plans.py
+# Functionality: 在种子数据库上运行 main_window.py 的全部只读查询（及触发器中的绩点子查询），记录耗时与逻辑读并与基线比较；出现回退时以非零状态退出
+#
+# 用法：基准库与生产库分开（默认 SchoolDB2_bench，不能为 SchoolDB2）
+#   python bench_query_plans.py --create               # 以建表脚本（库名替换为 --database）、触发器修改脚本和迁移脚本建库
+#   python bench_query_plans.py --seed                 # 写入种子数据
+#   python bench_query_plans.py --update-baseline      # 记录基线
+#   python bench_query_plans.py                        # 与基线比较
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+import db_utils
+import main_window as mw
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_query_baseline.json")
+
+# 建库脚本按执行顺序排列：(文件名, 编码)；建表脚本中的库名 SchoolDB2 会替换为基准库名
+SQL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_SCRIPTS = [
+    ("SQLQuery创建表和触发器3.sql", "gbk"),
+    ("SQLQuery修改器更改.sql", "gbk"),
+    ("SQLQuery迁移001_索引.sql", "utf-8"),
+]
+PRODUCTION_DB = "SchoolDB2"
+
+# 逻辑读超过基线 10%，或耗时超过基线 50% 且多于 5 毫秒，视为回退
+READS_TOLERANCE = 0.10
+TIME_TOLERANCE = 0.50
+TIME_SLACK_MS = 5.0
+
+SESSION_READS_QUERY = "SELECT logical_reads FROM sys.dm_exec_sessions WHERE session_id = @@SPID"
+
+# 以 sys.all_objects 交叉连接生成序号，集合方式写入种子数据；已存在时跳过
+SEED_SQL = """
+SET NOCOUNT ON;
+DECLARE @Students INT = ?, @Courses INT = ?, @PerStudent INT = ?;
+DECLARE @Classes INT = @Students / 30 + 1;
+IF NOT EXISTS (SELECT 1 FROM Department WHERE DeptID = 'BD01')
+BEGIN
+    SELECT TOP (@Students) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS i
+    INTO #n FROM sys.all_objects a CROSS JOIN sys.all_objects b CROSS JOIN sys.all_objects c;
+
+    INSERT INTO Department (DeptID, DeptName)
+    SELECT 'BD' + RIGHT('00' + CAST(i AS VARCHAR(10)), 2), 'Dept ' + CAST(i AS VARCHAR(10)) FROM #n WHERE i <= 10;
+
+    INSERT INTO Class (ClassID, ClassName, DeptID)
+    SELECT 'BCL' + RIGHT('0000' + CAST(i AS VARCHAR(10)), 4), 'Class ' + CAST(i AS VARCHAR(10)),
+           'BD' + RIGHT('00' + CAST(i % 10 + 1 AS VARCHAR(10)), 2)
+    FROM #n WHERE i <= @Classes;
+
+    INSERT INTO UserInfo (UserID, Username, Password, UserType)
+    SELECT 'BU' + RIGHT('000000' + CAST(i AS VARCHAR(10)), 6), 'bench' + CAST(i AS VARCHAR(10)), 'x', 'Student' FROM #n;
+
+    INSERT INTO Student (StudentID, StudentName, Gender, ClassID, UserID)
+    SELECT 'BS' + RIGHT('000000' + CAST(i AS VARCHAR(10)), 6), 'Student ' + CAST(i AS VARCHAR(10)),
+           CASE WHEN i % 2 = 0 THEN 'Male' ELSE 'Female' END,
+           'BCL' + RIGHT('0000' + CAST(i % @Classes + 1 AS VARCHAR(10)), 4),
+           'BU' + RIGHT('000000' + CAST(i AS VARCHAR(10)), 6)
+    FROM #n;
+
+    INSERT INTO Teacher (TeacherID, TeacherName, DeptID)
+    SELECT 'BT' + RIGHT('000' + CAST(i AS VARCHAR(10)), 3), 'Teacher ' + CAST(i AS VARCHAR(10)),
+           'BD' + RIGHT('00' + CAST(i % 10 + 1 AS VARCHAR(10)), 2)
+    FROM #n WHERE i <= 200;
+
+    INSERT INTO ClassRoom (ClassRoomID, Building, Floor, Capacity)
+    SELECT 'BR' + RIGHT('000' + CAST(i AS VARCHAR(10)), 3), CHOOSE(i % 3 + 1, 'Lab', 'T1', 'T2'), i % 5 + 1, 60
+    FROM #n WHERE i <= 100;
+
+    INSERT INTO Course (CourseID, CourseName, CourseType, Credits, MaxStudents)
+    SELECT 'BC' + RIGHT('0000' + CAST(i AS VARCHAR(10)), 4), 'Course ' + CAST(i AS VARCHAR(10)),
+           CHOOSE(i % 3 + 1, 'A', 'B', 'C'), 2.0 + i % 3, @Students
+    FROM #n WHERE i <= @Courses;
+
+    INSERT INTO CourseSchedule (CourseID, TeacherID, ClassRoomID, WeekDay, StartTime, EndTime)
+    SELECT 'BC' + RIGHT('0000' + CAST(n.i AS VARCHAR(10)), 4),
+           'BT' + RIGHT('000' + CAST(n.i % 200 + 1 AS VARCHAR(10)), 3),
+           'BR' + RIGHT('000' + CAST(n.i % 100 + 1 AS VARCHAR(10)), 3),
+           (n.i + s.k * 2) % 5 + 1,
+           TIMEFROMPARTS(8 + n.i % 5 * 2, 0, 0, 0, 0),
+           TIMEFROMPARTS(10 + n.i % 5 * 2, 0, 0, 0, 0)
+    FROM #n n CROSS JOIN (VALUES (0), (1)) AS s(k)
+    WHERE n.i <= @Courses;
+
+    SELECT s.i AS StudentNo, (s.i * 7 + k.i * 37) % @Courses + 1 AS CourseNo, k.i AS Slot
+    INTO #enroll
+    FROM #n s CROSS JOIN (SELECT i FROM #n WHERE i <= @PerStudent) AS k;
+
+    INSERT INTO StudentCourse (StudentID, CourseID)
+    SELECT DISTINCT 'BS' + RIGHT('000000' + CAST(StudentNo AS VARCHAR(10)), 6),
+                    'BC' + RIGHT('0000' + CAST(CourseNo AS VARCHAR(10)), 4)
+    FROM #enroll;
+
+    INSERT INTO Grade (StudentID, CourseID, Grade)
+    SELECT 'BS' + RIGHT('000000' + CAST(StudentNo AS VARCHAR(10)), 6),
+           'BC' + RIGHT('0000' + CAST(CourseNo AS VARCHAR(10)), 4),
+           MIN(40 + (StudentNo * 13 + Slot * 17) % 61)
+    FROM #enroll
+    GROUP BY StudentNo, CourseNo;
+END
+"""
+
+# 种子数据中的样例键
+STUDENT = "BS000001"
+COURSE = "BC0001"
+CLASS = "BCL0001"
+USER = "BU000001"
+
+def bench_queries():
+    """Returns [(name, sql, params)] for every read query issued by main_window.py, plus the trigger GPA subqueries."""
+    def resident(query):
+        return f"SELECT TOP ({mw.MAX_RESIDENT_ROWS + 1}) * FROM ({query}) AS q"
+
+    return [
+        ("class_status", mw.CLASS_STATUS_QUERY.format(where=""), ()),
+        ("class_status_refresh", mw.CLASS_STATUS_QUERY.format(where=mw.CLASS_IDS_WHERE.format("?")), (CLASS,)),
+        ("student_class_refresh", mw.STUDENT_CLASS_QUERY.format(where=mw.STUDENT_IDS_WHERE.format("?")), (STUDENT,)),
+        ("gpa_all", resident(mw.GPA_QUERY.format(where="")), ()),
+        ("gpa_student", resident(mw.GPA_QUERY.format(where="WHERE s.StudentID = ?")), (STUDENT,)),
+        ("gpa_refresh", mw.GPA_QUERY.format(where=mw.GPA_STUDENTS_WHERE.format("?")), (STUDENT,)),
+        ("gpa_filter_sql", resident(mw.GPA_QUERY.format(where=mw.GPA_FILTER_WHERE)), ("Student 1", "Student 1%", "Student 1%")),
+        ("course_overview", mw.COURSE_OVERVIEW_QUERY.format(where=""), ()),
+        ("course_overview_refresh", mw.COURSE_OVERVIEW_QUERY.format(where=mw.COURSE_IDS_WHERE.format("?")), (COURSE,)),
+        ("grade_all", resident(mw.GRADE_QUERY.format(where="")), ()),
+        ("grade_refresh", mw.GRADE_QUERY.format(where=mw.GRADE_KEYS_WHERE.format("(?, ?)")), (STUDENT, COURSE)),
+        ("grade_filter_sql", resident(mw.GRADE_QUERY.format(where=mw.GRADE_FILTER_WHERE)),
+         (STUDENT, STUDENT, "Student 1%", "Student 1%")),
+        ("student_gender", mw.STUDENT_GENDER_QUERY, (STUDENT,)),
+        ("course_list", mw.COURSE_LIST_QUERY, ()),
+        ("course_max_students", mw.COURSE_MAX_STUDENTS_QUERY, (COURSE,)),
+        ("course_enrolled_count", mw.COURSE_ENROLLED_COUNT_QUERY, (COURSE,)),
+        ("course_schedules", mw.COURSE_SCHEDULES_QUERY, (COURSE,)),
+        ("student_schedules", mw.STUDENT_SCHEDULES_QUERY, (STUDENT,)),
+        ("enrolled_courses", mw.ENROLLED_COURSES_QUERY, (STUDENT,)),
+        ("enrolled_new_course", mw.ENROLLED_COURSES_QUERY + " AND sc.CourseID = ?", (STUDENT, COURSE)),
+        ("export_schedule", mw.EXPORT_SCHEDULE_QUERY, (STUDENT,)),
+        # login_window.py 登录后按 UserID 查找 StudentID
+        ("student_by_user", "SELECT StudentID FROM Student WHERE UserID = ?", (USER,)),
+        # 触发器中的 TotalGPA 相关子查询
+        ("trigger_gpa_subquery",
+         "SELECT CAST(SUM(C.Credits * G.Point) / NULLIF(SUM(C.Credits), 0) AS DECIMAL(10, 2)) "
+         "FROM Grade G JOIN Course C ON G.CourseID = C.CourseID WHERE G.StudentID = ?", (STUDENT,)),
+        ("trigger_course_students", "SELECT DISTINCT StudentID FROM Grade WHERE CourseID = ?", (COURSE,)),
+        ("save_gpa_subquery", "SELECT AVG(Point) FROM Grade WHERE StudentID = ?", (STUDENT,)),
+    ]
+
+def _run(cursor, sql, params):
+    cursor.execute(sql, params) if params else cursor.execute(sql)
+    while True:
+        if cursor.description is not None:
+            cursor.fetchall()
+        if not cursor.nextset():
+            break
+
+def _batches(script):
+    """按单独成行的 GO 切分 T-SQL 脚本"""
+    batch = []
+    for line in script.splitlines():
+        if line.strip().upper() == "GO":
+            if any(l.strip() for l in batch):
+                yield "\n".join(batch)
+            batch = []
+        else:
+            batch.append(line)
+    if any(l.strip() for l in batch):
+        yield "\n".join(batch)
+
+def create_database(cursor, name):
+    """Runs SCHEMA_SCRIPTS on a master connection with the database name replaced, so the production DB is never touched."""
+    for filename, encoding in SCHEMA_SCRIPTS:
+        with open(os.path.join(SQL_DIR, filename), encoding=encoding) as f:
+            script = re.sub(rf"\b{PRODUCTION_DB}\b", name, f.read())
+        for batch in _batches(script):
+            _run(cursor, batch, ())
+
+def measure(cursor, sql, params, repeat):
+    """Returns (median milliseconds, logical reads) for one query after a warm-up run."""
+    _run(cursor, sql, params)
+    timings, reads = [], []
+    for _ in range(repeat):
+        before = cursor.execute(SESSION_READS_QUERY).fetchone()[0]
+        start = time.perf_counter()
+        _run(cursor, sql, params)
+        timings.append((time.perf_counter() - start) * 1000)
+        reads.append(cursor.execute(SESSION_READS_QUERY).fetchone()[0] - before)
+    return statistics.median(timings), min(reads)
+
+def compare(results, baseline):
+    """Returns a list of regression messages."""
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["logical_reads"] > base["logical_reads"] * (1 + READS_TOLERANCE):
+            failures.append(f"{name}: 逻辑读 {base['logical_reads']} -> {result['logical_reads']}")
+        if result["ms"] > base["ms"] * (1 + TIME_TOLERANCE) + TIME_SLACK_MS:
+            failures.append(f"{name}: 耗时 {base['ms']:.1f}ms -> {result['ms']:.1f}ms")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="main_window.py 查询计划回归基准")
+    parser.add_argument("--database", default="SchoolDB2_bench", help="基准数据库名（不要使用生产库）")
+    parser.add_argument("--create", action="store_true", help="建立基准库后退出")
+    parser.add_argument("--seed", action="store_true", help="写入种子数据后退出")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--courses", type=int, default=300)
+    parser.add_argument("--per-student", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="将本次结果写为基线")
+    args = parser.parse_args()
+    if args.database == PRODUCTION_DB:
+        parser.error(f"--database 不能是生产库 {PRODUCTION_DB}")
+
+    # 建库时连接 master，由建表脚本中的 CREATE DATABASE / USE 切换到基准库
+    db_utils.DB_NAME = "master" if args.create else args.database
+    conn = db_utils.get_db_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        if args.create:
+            create_database(cursor, args.database)
+            print(f"已建立基准库 {args.database}")
+            sys.exit(0)
+        if args.seed:
+            _run(cursor, SEED_SQL, (args.students, args.courses, args.per_student))
+            print(f"已写入种子数据到 {args.database}")
+            sys.exit(0)
+
+        results = {}
+        print(f"{'查询':<28}{'耗时ms':>10}{'逻辑读':>10}")
+        for name, sql, params in bench_queries():
+            ms, reads = measure(cursor, sql, params, args.repeat)
+            results[name] = {"ms": round(ms, 2), "logical_reads": reads}
+            print(f"{name:<28}{ms:>10.2f}{reads:>10}")
+    finally:
+        conn.close()
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"基线已写入 {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print("未找到基线，请先使用 --update-baseline 记录")
+        sys.exit(1)
+    with open(args.baseline, encoding='utf-8') as f:
+        failures = compare(results, json.load(f))
+    for msg in failures:
+        print(f"回退 {msg}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,100 @@
+# File: bench_table_index.py
+# Functionality: 以合成的成绩表数据（默认 100 万行）测量 TableIndex 每次按键的筛选耗时（lookup_mask 及排序视图），超过 16 毫秒预算时以非零状态退出；
+#                同时报告整批追加与删除行的索引维护耗时
+
+import argparse
+import random
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from table_index import TableIndex
+
+KEYSTROKE_BUDGET_MS = 16.0
+
+SURNAMES = ["张", "王", "李", "赵", "刘", "陈", "杨", "黄"]
+
+# 与成绩管理表相同的列：StudentID, StudentName, CourseID, CourseName, Grade, Point
+EXACT_COLUMNS = (0, 2)
+PREFIX_COLUMNS = (1, 3)
+
+# (说明, 筛选文本)：覆盖全部命中、约八分之一命中、少量命中、精确 ID 和无命中
+QUERIES = [
+    ("1-char prefix", "C"),
+    ("surname prefix", "王"),
+    ("course name prefix", "Course A"),
+    ("name prefix", "张同学1"),
+    ("exact StudentID", "S0000001"),
+    ("exact CourseID", "C0001"),
+    ("no match", "zzz"),
+]
+
+SORTS = [
+    ("no sort", []),
+    ("Grade", [(4, False)]),
+    ("Grade desc, name", [(4, True), (1, False)]),
+]
+
+def synthetic_rows(count, seed=1):
+    rng = random.Random(seed)
+    return [
+        [f"S{i:07d}", f"{rng.choice(SURNAMES)}同学{rng.randint(0, 99999)}", f"C{i % 500:04d}",
+         f"Course {chr(65 + i % 8)}{i % 500}", Decimal(rng.randint(0, 1000)) / 10, Decimal(rng.randint(0, 50)) / 10]
+        for i in range(count)
+    ]
+
+def best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TableIndex 按键筛选耗时")
+    parser.add_argument("--rows", type=int, default=1000000, help="合成行数")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数，取最快")
+    parser.add_argument("--budget-ms", type=float, default=KEYSTROKE_BUDGET_MS, help="每次按键的耗时预算（毫秒）")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    start = time.perf_counter()
+    index = TableIndex(rows, EXACT_COLUMNS, PREFIX_COLUMNS)
+    print(f"建立索引: {time.perf_counter() - start:.2f}s（{args.rows} 行）")
+
+    failures = []
+    print(f"{'排序':<20}{'筛选':<20}{'命中行数':>10}{'耗时ms':>10}")
+    for sort_name, sort_keys in SORTS:
+        start = time.perf_counter()
+        order = index.sort_order(sort_keys) if sort_keys else None
+        if sort_keys:
+            print(f"{sort_name:<20}{'(点击表头排序)':<20}{'':>10}{(time.perf_counter() - start) * 1000:>10.1f}")
+        for query_name, text in QUERIES:
+            ms, ids = best_ms(lambda: index.filter_view(text, order), args.repeat)
+            print(f"{sort_name:<20}{query_name:<20}{len(ids):>10}{ms:>10.1f}")
+            if ms > args.budget_ms:
+                failures.append(f"{sort_name} / {query_name} 筛选 {ms:.1f}ms 超出预算 {args.budget_ms:g}ms")
+
+    # 实时刷新的整批维护：追加 1000 行、删除 10 行
+    new_rows = synthetic_rows(1000, seed=2)
+    for i, row in enumerate(new_rows):
+        row[0] = f"N{i:07d}"
+    start = time.perf_counter()
+    rows.extend(new_rows)
+    index.add_rows(len(rows) - len(new_rows), new_rows)
+    print(f"追加 1000 行: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    keep = np.ones(len(rows), dtype=bool)
+    keep[np.linspace(0, len(rows) - 1, 10, dtype=np.int64)] = False
+    start = time.perf_counter()
+    rows = [row for row, k in zip(rows, keep.tolist()) if k]
+    index.remove_rows(keep, rows)
+    print(f"删除 10 行: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for msg in failures:
+        print(f"失败 {msg}")
+    sys.exit(1 if failures else 0)
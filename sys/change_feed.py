@@ -0,0 +1,119 @@
+# File: change_feed.py
+# Functionality: 提供数据变更源（SQL Server Change Tracking 或本地替身），并在后台线程中轮询，将变更的行键推送给界面
+
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from db_utils import get_db_connection
+
+# 需要跟踪的表及其主键列
+TRACKED_TABLES = {
+    "Grade": ("StudentID", "CourseID"),
+    "Student": ("StudentID",),
+    "StudentCourse": ("StudentID", "CourseID"),
+}
+
+# 变更记录已不完整时返回的唯一一项，接收方需全量重新加载
+RELOAD_ALL = ("*", "R", ())
+
+class ChangeTrackingFeed:
+    """Reads changed primary keys from CHANGETABLE(CHANGES ...) since the last polled version."""
+
+    def __init__(self, tables=TRACKED_TABLES):
+        self.tables = tables
+        self.conn = get_db_connection()
+        self.conn.autocommit = True
+        self.version = self._current_version()
+        if self.version is None:
+            self.conn.close()
+            raise RuntimeError("数据库未启用 Change Tracking")
+
+    def _current_version(self):
+        return self.conn.cursor().execute("SELECT CHANGE_TRACKING_CURRENT_VERSION()").fetchone()[0]
+
+    def record(self, table, op, key):
+        """Changes are captured by the server; nothing to do."""
+
+    def poll(self):
+        """Returns [(table, op, key), ...] changed since the previous poll. op is 'I', 'U' or 'D'.
+        Returns [RELOAD_ALL] when the previous version is older than a table's minimum valid version."""
+        current = self._current_version()
+        if current == self.version:
+            return []
+        cursor = self.conn.cursor()
+        for table in self.tables:
+            min_valid = cursor.execute("SELECT CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID(?))", (table,)).fetchone()[0]
+            # 超出保留期的变更已被清理，CHANGETABLE 的结果不再完整
+            if min_valid is None or self.version < min_valid:
+                self.version = current
+                return [RELOAD_ALL]
+        changes = []
+        for table, key_columns in self.tables.items():
+            cols = ", ".join(f"ct.{c}" for c in key_columns)
+            cursor.execute(
+                f"SELECT ct.SYS_CHANGE_OPERATION, {cols} FROM CHANGETABLE(CHANGES {table}, ?) AS ct "
+                "WHERE ct.SYS_CHANGE_VERSION <= ?",
+                (self.version, current)
+            )
+            changes.extend((table, row[0], tuple(row[1:])) for row in cursor.fetchall())
+        self.version = current
+        return changes
+
+    def close(self):
+        self.conn.close()
+
+class LocalChangeFeed:
+    """In-process stand-in for ChangeTrackingFeed; changes are pushed in with record()."""
+
+    def __init__(self):
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def record(self, table, op, key):
+        with self._lock:
+            self._pending.append((table, op, tuple(key)))
+
+    def poll(self):
+        with self._lock:
+            changes, self._pending = self._pending, []
+        return changes
+
+    def close(self):
+        pass
+
+def open_change_feed():
+    """Returns a ChangeTrackingFeed, or a LocalChangeFeed when change tracking is unavailable."""
+    try:
+        return ChangeTrackingFeed()
+    except Exception as e:
+        print(f"Change Tracking 不可用，改用本地变更源: {e}")
+        return LocalChangeFeed()
+
+class ChangePoller(QThread):
+    """Polls a change feed in the background and emits non-empty change lists."""
+    changes_ready = pyqtSignal(list)
+
+    def __init__(self, feed, interval_ms=2000, parent=None):
+        super().__init__(parent)
+        self.feed = feed
+        self.interval_ms = interval_ms
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            try:
+                changes = self.feed.poll()
+                if changes:
+                    self.changes_ready.emit(changes)
+            except Exception as e:
+                print(f"轮询变更失败: {e}")
+            # 分段休眠，以便 stop() 能及时返回
+            for _ in range(max(1, self.interval_ms // 100)):
+                if self.isInterruptionRequested():
+                    break
+                self.msleep(100)
+
+    def stop(self):
+        self.requestInterruption()
+        self.wait()
+        self.feed.close()
@@ -1,6 +1,8 @@
 # File: db_utils.py
 # Functionality: 负责数据库连接与查询执行，提供用于操作 SQL Server 数据库的工具函数
 
+from collections import namedtuple
+
 import pyodbc
 
 DB_DRIVER = "ODBC Driver 17 for SQL Server"
@@ -12,6 +14,16 @@ USERID_COLUMN = "UserID"
 PASSWORD_COLUMN = "Password"
 USERTYPE_COLUMN = "UserType"
 
+# 流式查询每次 fetchmany 的行数
+DEFAULT_BATCH_SIZE = 5000
+
+ColumnBatch = namedtuple("ColumnBatch", "names types columns")
+
+def chunks(items, size):
+    """Yields consecutive slices of items with at most size elements, e.g. to keep IN lists under the parameter limit."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 def get_db_connection():
     """Establishes and returns a connection to the SQL Server database."""
     conn_str = (
@@ -33,6 +45,39 @@ def db_query_all(query, params=()):
     finally:
         conn.close()
 
+def _execute_stream(query, params, batch_size):
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.arraysize = batch_size
+        cursor.execute(query, params) if params else cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield cursor.description, rows
+    finally:
+        conn.close()
+
+def db_stream(query, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    """Executes a query and yields its rows in fetchmany batches instead of materializing the whole result set."""
+    for _, rows in _execute_stream(query, params, batch_size):
+        yield rows
+
+def db_iter(query, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    """Executes a query and yields rows one at a time, fetching batch_size rows per round trip."""
+    for rows in db_stream(query, params, batch_size):
+        yield from rows
+
+def db_stream_columns(query, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    """Executes a query and yields one ColumnBatch(names, types, columns) per fetchmany batch; columns[i] holds column i's values."""
+    for description, rows in _execute_stream(query, params, batch_size):
+        yield ColumnBatch(
+            [d[0] for d in description],
+            [d[1] for d in description],
+            [list(col) for col in zip(*rows)]
+        )
+
 def db_query_one(query, params=()):
     """Executes a query and fetches one row."""
     conn = get_db_connection()
@@ -44,6 +89,21 @@ def db_query_one(query, params=()):
     finally:
         conn.close()
 
+def db_execute_returning(query, params=()):
+    """Executes a command batch ending in a SELECT, commits, and returns the rows of that SELECT."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params) if params else cursor.execute(query)
+        # 跳过 INSERT/UPDATE 产生的无结果集部分，定位到最后的 SELECT
+        while cursor.description is None and cursor.nextset():
+            pass
+        rows = cursor.fetchall() if cursor.description is not None else []
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
 def db_execute(query, params=()):
     """Executes a non-query command (INSERT/UPDATE/DELETE) and commits changes."""
     conn = get_db_connection()
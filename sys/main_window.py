@@ -2,15 +2,137 @@
 # Functionality: 管理应用主窗口，该窗口包含多个功能标签页，涵盖班级状态、平均学分绩点、课程信息、成绩管理、选课操作、课表导出及校园地图等功能。
 # File: main_window.py
 import csv
-from functools import partial
 from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
-                             QMessageBox, QComboBox, QPushButton, QLabel, 
+                             QMessageBox, QComboBox, QLabel, QApplication,
                              QTableWidget, QTableWidgetItem, QHeaderView, QHBoxLayout)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
-from ui_utils import create_table, styled_button
-from db_utils import db_execute_many, db_query_all, db_execute, db_query_one
+from ui_utils import (create_model_table, create_indexed_table, create_filter_bar, styled_button, ButtonDelegate,
+                      RowTableModel)
+from db_utils import db_execute_many, db_query_all, db_query_one, db_execute_returning, db_iter, db_stream, chunks
 from map_widget import MapWidget
+from change_feed import open_change_feed, ChangePoller, RELOAD_ALL
+from analytics import AnalyticsSnapshot, REPORTS
+from timetable_audit import run_audit, report_rows, summarize, write_report, REPORT_HEADERS
+
+# 后台轮询变更源的间隔（毫秒）
+LIVE_REFRESH_INTERVAL_MS = 2000
+
+# 筛选表格最多载入内存的行数，超过时筛选改由数据库执行
+MAX_RESIDENT_ROWS = 1000000
+
+# 各统计表的查询，{where} 为空时全量加载，增量刷新时填入按键过滤的条件
+CLASS_STATUS_QUERY = """
+    SELECT c.ClassID, c.ClassName, d.DeptName, COUNT(DISTINCT s.StudentID) AS StudentCount,
+           AVG(g.Grade) AS AvgScore,
+           CASE WHEN COUNT(g.StudentID) = 0 THEN 0
+                ELSE CAST(100.0 * SUM(CASE WHEN g.Grade >= 60 THEN 1 ELSE 0 END) / COUNT(g.StudentID) AS INT)
+           END AS PassRate
+    FROM Class c LEFT JOIN Department d ON c.DeptID = d.DeptID
+                 LEFT JOIN Student s ON s.ClassID = c.ClassID
+                 LEFT JOIN Grade g ON g.StudentID = s.StudentID
+    {where}
+    GROUP BY c.ClassID, c.ClassName, d.DeptName
+"""
+
+GPA_QUERY = """
+    SELECT d.DeptID, d.DeptName, s.StudentID, s.StudentName, c.ClassName, ISNULL(s.TotalGPA, 0) AS TotalGPA,
+           ISNULL(AVG(g.Grade), 0) AS AvgGrade
+    FROM Student s INNER JOIN Class c ON s.ClassID = c.ClassID
+                   INNER JOIN Department d ON c.DeptID = d.DeptID
+                   LEFT JOIN Grade g ON g.StudentID = s.StudentID
+    {where}
+    GROUP BY d.DeptID, d.DeptName, s.StudentID, s.StudentName, c.ClassName, s.TotalGPA
+"""
+
+COURSE_OVERVIEW_QUERY = """
+    SELECT c.CourseID, c.CourseName, COUNT(DISTINCT sc.StudentID) AS StudentCount,
+           AVG(g.Grade) AS AvgScore,
+           CASE WHEN COUNT(g.StudentID) = 0 THEN 0
+                ELSE CAST(100.0 * SUM(CASE WHEN g.Grade >= 60 THEN 1 ELSE 0 END) / COUNT(g.StudentID) AS INT)
+           END AS PassRate,
+           SUM(CASE WHEN g.Grade < 60 THEN 1 ELSE 0 END) AS RetakeCount
+    FROM Course c LEFT JOIN StudentCourse sc ON sc.CourseID = c.CourseID
+                  LEFT JOIN Grade g ON g.CourseID = c.CourseID AND g.StudentID = sc.StudentID
+    {where}
+    GROUP BY c.CourseID, c.CourseName
+"""
+
+GRADE_QUERY = """
+    SELECT g.StudentID, s.StudentName, g.CourseID, c.CourseName, g.Grade, g.Point
+    FROM Grade g LEFT JOIN Student s ON s.StudentID = g.StudentID
+                 LEFT JOIN Course c ON c.CourseID = g.CourseID
+    {where}
+"""
+
+# 已选课程列表查询，选课后追加 "AND sc.CourseID = ?" 只取新课程的行
+ENROLLED_COURSES_QUERY = """
+    SELECT c.CourseName, cs.WeekDay, cs.StartTime, cs.EndTime, cr.Building, t.TeacherName
+    FROM StudentCourse sc 
+    INNER JOIN Course c ON sc.CourseID = c.CourseID
+    LEFT JOIN CourseSchedule cs ON c.CourseID = cs.CourseID
+    LEFT JOIN ClassRoom cr ON cs.ClassRoomID = cr.ClassRoomID
+    LEFT JOIN Teacher t ON cs.TeacherID = t.TeacherID
+    WHERE sc.StudentID = ?
+"""
+
+# 增量刷新与数据库筛选使用的 {where} 条件
+GRADE_KEYS_WHERE = (
+    "WHERE EXISTS (SELECT 1 FROM (VALUES {}) "
+    "AS k(StudentID, CourseID) WHERE k.StudentID = g.StudentID AND k.CourseID = g.CourseID)"
+)
+GPA_STUDENTS_WHERE = "WHERE s.StudentID IN ({})"
+CLASS_IDS_WHERE = "WHERE c.ClassID IN ({})"
+COURSE_IDS_WHERE = "WHERE c.CourseID IN ({})"
+GPA_FILTER_WHERE = "WHERE s.StudentID = ? OR s.StudentName LIKE ? OR c.ClassName LIKE ?"
+GRADE_FILTER_WHERE = "WHERE g.StudentID = ? OR g.CourseID = ? OR s.StudentName LIKE ? OR c.CourseName LIKE ?"
+
+# 学生所在班级，用于在学生转班或删除后刷新原班级
+STUDENT_CLASS_QUERY = "SELECT StudentID, ClassID FROM Student {where}"
+STUDENT_IDS_WHERE = "WHERE StudentID IN ({})"
+
+STUDENT_GENDER_QUERY = "SELECT Gender FROM Student WHERE StudentID = ?"
+COURSE_LIST_QUERY = "SELECT CourseID, CourseName FROM Course"
+COURSE_MAX_STUDENTS_QUERY = "SELECT MaxStudents FROM Course WHERE CourseID = ?"
+COURSE_ENROLLED_COUNT_QUERY = "SELECT COUNT(*) FROM StudentCourse WHERE CourseID = ?"
+COURSE_SCHEDULES_QUERY = "SELECT WeekDay, StartTime, EndTime FROM CourseSchedule WHERE CourseID = ?"
+STUDENT_SCHEDULES_QUERY = """
+    SELECT cs.WeekDay, cs.StartTime, cs.EndTime
+    FROM StudentCourse sc INNER JOIN CourseSchedule cs ON sc.CourseID = cs.CourseID
+    WHERE sc.StudentID = ?
+"""
+EXPORT_SCHEDULE_QUERY = """
+    SELECT c.CourseName, cs.WeekDay, cs.StartTime, cs.EndTime, cr.Building, t.TeacherName
+    FROM StudentCourse sc INNER JOIN Course c ON sc.CourseID = c.CourseID
+                          INNER JOIN CourseSchedule cs ON c.CourseID = cs.CourseID
+                          INNER JOIN ClassRoom cr ON cs.ClassRoomID = cr.ClassRoomID
+                          INNER JOIN Teacher t ON cs.TeacherID = t.TeacherID
+    WHERE sc.StudentID = ?
+"""
+
+def _like_prefix(text):
+    """将文本转义为 LIKE 前缀匹配模式"""
+    return text.replace("[", "[[]").replace("%", "[%]").replace("_", "[_]") + "%"
+
+def _load_resident(query, params=()):
+    """最多载入 MAX_RESIDENT_ROWS 行，返回 (rows, 是否已全部载入)"""
+    rows = [list(row) for row in db_iter(f"SELECT TOP ({MAX_RESIDENT_ROWS + 1}) * FROM ({query}) AS q", params)]
+    resident = len(rows) <= MAX_RESIDENT_ROWS
+    if not resident:
+        rows.pop()
+    return rows, resident
+
+def _stream_rows(model, query, params=()):
+    """逐批追加到表格模型并处理界面事件，使已到达的行立即显示；最多 MAX_RESIDENT_ROWS 行，返回是否已全部载入"""
+    loaded = 0
+    for rows in db_stream(f"SELECT TOP ({MAX_RESIDENT_ROWS + 1}) * FROM ({query}) AS q", params):
+        if loaded + len(rows) > MAX_RESIDENT_ROWS:
+            model.append_rows(rows[:MAX_RESIDENT_ROWS - loaded])
+            return False
+        model.append_rows(rows)
+        loaded += len(rows)
+        QApplication.processEvents()
+    return True
 
 class MainWindow(QMainWindow):
     def __init__(self, user_type="Student", student_id=None, user_id=None):
@@ -26,7 +148,7 @@ class MainWindow(QMainWindow):
         if self.student_id:
             try:
                 # 假设 Student 表有 Gender 字段
-                row = db_query_one("SELECT Gender FROM Student WHERE StudentID = ?", (self.student_id,))
+                row = db_query_one(STUDENT_GENDER_QUERY, (self.student_id,))
                 if row:
                     self.student_gender = row[0]
             except Exception as e:
@@ -41,6 +163,10 @@ class MainWindow(QMainWindow):
         
         if self.user_type in ("Teacher", "Admin"):
             self.create_grade_manage_tab()
+            self.create_analytics_tab()
+
+        if self.user_type == "Admin":
+            self.create_timetable_audit_tab()
             
         if self.user_type == "Student":
             self.create_course_selection_tab()
@@ -49,85 +175,83 @@ class MainWindow(QMainWindow):
         # 地图 Tab 必须初始化
         self.create_map_tab()
 
+        self.start_live_refresh()
+        # 窗口显示后再载入数据，各表边接收边显示
+        QTimer.singleShot(0, self.load_tables)
+
+    def load_tables(self):
+        self.load_class_status()
+        self.load_gpa_data()
+        self.load_course_overview()
+        if hasattr(self, "grade_table"):
+            self.load_grade_data()
+
     def create_class_status_tab(self):
         headers = ["ClassID", "ClassName", "DepartmentName", "人数", "平均成绩", "及格率"]
+        self.class_table = create_model_table(headers, [], key_columns=(0,))
+        self.student_classes = {}
+        self.tabs.addTab(self.class_table, "班级情况")
+
+    def load_class_status(self):
+        model = self.class_table.model()
+        model.reset_rows([])
         try:
-            rows = db_query_all(
-                """
-                SELECT c.ClassID, c.ClassName, d.DeptName, COUNT(DISTINCT s.StudentID) AS StudentCount,
-                       AVG(g.Grade) AS AvgScore,
-                       CASE WHEN COUNT(g.StudentID) = 0 THEN 0
-                            ELSE CAST(100.0 * SUM(CASE WHEN g.Grade >= 60 THEN 1 ELSE 0 END) / COUNT(g.StudentID) AS INT)
-                       END AS PassRate
-                FROM Class c LEFT JOIN Department d ON c.DeptID = d.DeptID
-                             LEFT JOIN Student s ON s.ClassID = c.ClassID
-                             LEFT JOIN Grade g ON g.StudentID = s.StudentID
-                GROUP BY c.ClassID, c.ClassName, d.DeptName
-                """
-            )
-            data = [list(row) for row in rows]
+            _stream_rows(model, CLASS_STATUS_QUERY.format(where=""))
+            self.student_classes = dict(db_iter(STUDENT_CLASS_QUERY.format(where="")))
         except Exception as e:
             QMessageBox.critical(self, "数据库错误", f"查询班级情况失败：\n{e}")
-            data = []
-        table = create_table(headers, data)
-        self.tabs.addTab(table, "班级情况")
+            self.student_classes = {}
 
     def create_gpa_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+        tab.setLayout(layout)
+
         headers = ["DeptID", "系名称", "学生ID", "学生姓名", "班级", "总绩点", "平均分"]
+        self.gpa_table = create_indexed_table(headers, [], key_columns=(2,), exact_columns=(2,), prefix_columns=(3, 4))
+
+        layout.addWidget(create_filter_bar(self.gpa_table, "按学生ID筛选，或输入学生姓名/班级开头", self.filter_gpa_sql))
+        layout.addWidget(self.gpa_table)
+        self.tabs.addTab(tab, "学生绩点")
+
+    def load_gpa_data(self):
+        model = self.gpa_table.model()
+        model.begin_loading()
         try:
             if self.user_type == "Student" and self.student_id:
-                rows = db_query_all(
-                    """
-                    SELECT d.DeptID, d.DeptName, s.StudentID, s.StudentName, c.ClassName, ISNULL(s.TotalGPA, 0) AS TotalGPA,
-                           ISNULL(AVG(g.Grade), 0) AS AvgGrade
-                    FROM Student s INNER JOIN Class c ON s.ClassID = c.ClassID
-                                   INNER JOIN Department d ON c.DeptID = d.DeptID
-                                   LEFT JOIN Grade g ON g.StudentID = s.StudentID
-                    WHERE s.StudentID = ?
-                    GROUP BY d.DeptID, d.DeptName, s.StudentID, s.StudentName, c.ClassName, s.TotalGPA
-                    """,
-                    (self.student_id,)
-                )
+                model.resident = _stream_rows(model, GPA_QUERY.format(where="WHERE s.StudentID = ?"), (self.student_id,))
             else:
-                rows = db_query_all(
-                    """
-                    SELECT d.DeptID, d.DeptName, s.StudentID, s.StudentName, c.ClassName, ISNULL(s.TotalGPA, 0) AS TotalGPA,
-                           ISNULL(AVG(g.Grade), 0) AS AvgGrade
-                    FROM Student s INNER JOIN Class c ON s.ClassID = c.ClassID
-                                   INNER JOIN Department d ON c.DeptID = d.DeptID
-                                   LEFT JOIN Grade g ON g.StudentID = s.StudentID
-                    GROUP BY d.DeptID, d.DeptName, s.StudentID, s.StudentName, c.ClassName, s.TotalGPA
-                    """
-                )
-            data = [list(row) for row in rows]
+                model.resident = _stream_rows(model, GPA_QUERY.format(where=""))
         except Exception as e:
             QMessageBox.critical(self, "数据库错误", f"查询学生绩点失败：\n{e}")
-            data = []
-        table = create_table(headers, data)
-        self.tabs.addTab(table, "学生绩点")
+        finally:
+            model.finish_loading()
+
+    def filter_gpa_sql(self, text):
+        """学生绩点数据未全部载入时，由数据库执行筛选"""
+        try:
+            if not text:
+                rows, _ = _load_resident(GPA_QUERY.format(where=""))
+            else:
+                rows, _ = _load_resident(GPA_QUERY.format(where=GPA_FILTER_WHERE),
+                                         (text, _like_prefix(text), _like_prefix(text)))
+            return rows
+        except Exception as e:
+            QMessageBox.critical(self, "数据库错误", f"筛选学生绩点失败：\n{e}")
+            return []
 
     def create_course_overview_tab(self):
         headers = ["CourseID", "CourseName", "选课人数", "平均分", "及格率", "重修人数"]
+        self.course_table = create_model_table(headers, [], key_columns=(0,))
+        self.tabs.addTab(self.course_table, "选课总览")
+
+    def load_course_overview(self):
+        model = self.course_table.model()
+        model.reset_rows([])
         try:
-            rows = db_query_all(
-                """
-                SELECT c.CourseID, c.CourseName, COUNT(DISTINCT sc.StudentID) AS StudentCount,
-                       AVG(g.Grade) AS AvgScore,
-                       CASE WHEN COUNT(g.StudentID) = 0 THEN 0
-                            ELSE CAST(100.0 * SUM(CASE WHEN g.Grade >= 60 THEN 1 ELSE 0 END) / COUNT(g.StudentID) AS INT)
-                       END AS PassRate,
-                       SUM(CASE WHEN g.Grade < 60 THEN 1 ELSE 0 END) AS RetakeCount
-                FROM Course c LEFT JOIN StudentCourse sc ON sc.CourseID = c.CourseID
-                              LEFT JOIN Grade g ON g.CourseID = c.CourseID AND g.StudentID = sc.StudentID
-                GROUP BY c.CourseID, c.CourseName
-                """
-            )
-            data = [list(row) for row in rows]
+            _stream_rows(model, COURSE_OVERVIEW_QUERY.format(where=""))
         except Exception as e:
             QMessageBox.critical(self, "数据库错误", f"查询选课总览失败：\n{e}")
-            data = []
-        table = create_table(headers, data)
-        self.tabs.addTab(table, "选课总览")
 
     # --- 成绩管理部分  -
     def create_grade_manage_tab(self):
@@ -137,12 +261,12 @@ class MainWindow(QMainWindow):
 
         # 初始化表格
         headers = ["StudentID", "StudentName", "CourseID", "CourseName", "Grade", "Point"]
-        self.grade_table = create_table(headers, [], editable_columns=[4, 5])
+        self.grade_table = create_indexed_table(headers, [], key_columns=(0, 2), editable_columns=[4, 5],
+                                                exact_columns=(0, 2), prefix_columns=(1, 3))
+        layout.addWidget(create_filter_bar(self.grade_table, "按学生ID/课程ID筛选，或输入学生姓名/课程名开头",
+                                           self.filter_grade_sql))
         layout.addWidget(self.grade_table)
 
-        # 加载数据
-        self.load_grade_data()
-
         save_btn = styled_button("保存修改并刷新绩点", style="save")
         save_btn.clicked.connect(self.save_grade_changes)
         layout.addWidget(save_btn)
@@ -150,44 +274,44 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(tab, "成绩管理")
 
     def load_grade_data(self):
-        """单独提取加载数据的逻辑，以便刷新"""
+        """全量流式加载成绩表，在窗口显示后及变更记录过期时调用；之后的变化由 apply_changes 逐行刷新"""
+        model = self.grade_table.model()
+        model.begin_loading()
         try:
-            rows = db_query_all(
-                """
-                SELECT g.StudentID, s.StudentName, g.CourseID, c.CourseName, g.Grade, g.Point
-                FROM Grade g LEFT JOIN Student s ON s.StudentID = g.StudentID
-                             LEFT JOIN Course c ON c.CourseID = g.CourseID
-                """
-            )
-            data = [list(row) for row in rows]
-            
-            # 更新表格内容
-            self.grade_table.setRowCount(len(data))
-            editable_columns = [4, 5]
-            for i, row in enumerate(data):
-                for j, item in enumerate(row):
-                    qitem = QTableWidgetItem(str(item) if item is not None else "")
-                    if j in editable_columns:
-                        qitem.setFlags(qitem.flags() | Qt.ItemIsEditable)
-                    else:
-                        qitem.setFlags(qitem.flags() & ~Qt.ItemIsEditable)
-                    self.grade_table.setItem(i, j, qitem)
+            model.resident = _stream_rows(model, GRADE_QUERY.format(where=""))
         except Exception as e:
             QMessageBox.critical(self, "数据库错误", f"加载成绩失败：\n{e}")
+        finally:
+            model.finish_loading()
+
+    def filter_grade_sql(self, text):
+        """成绩数据未全部载入时，由数据库执行筛选"""
+        try:
+            if not text:
+                rows, _ = _load_resident(GRADE_QUERY.format(where=""))
+            else:
+                rows, _ = _load_resident(GRADE_QUERY.format(where=GRADE_FILTER_WHERE),
+                                         (text, text, _like_prefix(text), _like_prefix(text)))
+            return rows
+        except Exception as e:
+            QMessageBox.critical(self, "数据库错误", f"筛选成绩失败：\n{e}")
+            return []
 
     def save_grade_changes(self):
-        row_count = self.grade_table.rowCount()
-        if row_count == 0:
+        model = self.grade_table.model()
+        if not model.dirty:
             return
         
         params_list = []
         affected_students = set()
-
-        for i in range(row_count):
-            student_id = self.grade_table.item(i, 0).text().strip()
-            course_id = self.grade_table.item(i, 2).text().strip()
-            grade_text = self.grade_table.item(i, 4).text().strip()
-            point_text = self.grade_table.item(i, 5).text().strip()
+        saved_rows = []
+
+        # 只保存已编辑的行
+        for i in sorted(model.dirty):
+            student_id = model.cell_text(i, 0)
+            course_id = model.cell_text(i, 2)
+            grade_text = model.cell_text(i, 4)
+            point_text = model.cell_text(i, 5)
             
             if not student_id or not course_id:
                 continue
@@ -196,8 +320,9 @@ class MainWindow(QMainWindow):
                 point_val = float(point_text) if point_text else None
                 params_list.append((grade_val, point_val, student_id, course_id))
                 affected_students.add(student_id)
+                saved_rows.append(i)
             except ValueError:
-                QMessageBox.warning(self, "格式错误", f"第 {i+1} 行的成绩/绩点格式不正确")
+                QMessageBox.warning(self, "格式错误", f"学生 {student_id} 课程 {course_id} 的成绩/绩点格式不正确")
                 continue
 
         if params_list:
@@ -220,12 +345,222 @@ class MainWindow(QMainWindow):
 
                 QMessageBox.information(self, "成功", "成绩已保存，且学生绩点已刷新。")
                 
-                # 3. 刷新表格显示
-                self.load_grade_data()
+                # 3. 由变更源推送受影响的行，无需全量重载
+                model.dirty.difference_update(saved_rows)
+                for _, _, student_id, course_id in params_list:
+                    self.change_feed.record("Grade", "U", (student_id, course_id))
+                for student_id in affected_students:
+                    self.change_feed.record("Student", "U", (student_id,))
                 
             except Exception as e:
                 QMessageBox.critical(self, "数据库错误", f"保存失败：\n{e}")
 
+    # --- 统计分析部分 ---
+    def create_analytics_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+        tab.setLayout(layout)
+
+        top_layout = QHBoxLayout()
+        self.report_combo = QComboBox()
+        self.report_combo.setMinimumWidth(200)
+        self.report_combo.addItems(list(REPORTS))
+        self.report_combo.currentIndexChanged.connect(self.show_analytics_report)
+        refresh_btn = styled_button("刷新报表")
+        refresh_btn.clicked.connect(self.show_analytics_report)
+        reload_btn = styled_button("重新载入快照", style="save")
+        reload_btn.clicked.connect(self.reload_analytics)
+        self.analytics_status = QLabel()
+        top_layout.addWidget(QLabel("报表："))
+        top_layout.addWidget(self.report_combo)
+        top_layout.addWidget(refresh_btn)
+        top_layout.addWidget(reload_btn)
+        top_layout.addWidget(self.analytics_status)
+        top_layout.addStretch()
+        layout.addLayout(top_layout)
+
+        self.analytics_table = create_model_table([], [])
+        layout.addWidget(self.analytics_table)
+
+        # 首次切换到本标签页时才载入列式快照，之后由变更源增量刷新
+        self.analytics = None
+        self.analytics_stale = False
+        self.analytics_tab = tab
+        self.tabs.addTab(tab, "统计分析")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is not self.analytics_tab:
+            return
+        if self.analytics is None:
+            self.reload_analytics()
+        elif self.analytics_stale:
+            self.show_analytics_report()
+
+    def reload_analytics(self):
+        try:
+            self.analytics = AnalyticsSnapshot()
+        except Exception as e:
+            QMessageBox.critical(self, "数据库错误", f"加载统计快照失败：\n{e}")
+            return
+        self.show_analytics_report()
+
+    def show_analytics_report(self):
+        if self.analytics is None:
+            return
+        try:
+            headers, rows = REPORTS[self.report_combo.currentText()](self.analytics)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"计算报表失败：\n{e}")
+            return
+        old_model = self.analytics_table.model()
+        self.analytics_table.setModel(RowTableModel(headers, rows, parent=self.analytics_table))
+        old_model.deleteLater()
+        self.analytics_stale = False
+        self.analytics_status.clear()
+
+    # --- 排课冲突检查部分 ---
+    def create_timetable_audit_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout()
+        tab.setLayout(layout)
+
+        btn_layout = QHBoxLayout()
+        audit_btn = styled_button("运行排课冲突检查", style="save")
+        audit_btn.clicked.connect(self.run_timetable_audit)
+        export_btn = styled_button("导出冲突报告到CSV", style="save")
+        export_btn.clicked.connect(self.export_timetable_audit)
+        btn_layout.addWidget(audit_btn)
+        btn_layout.addWidget(export_btn)
+        btn_layout.addStretch()
+        layout.addLayout(btn_layout)
+
+        self.audit_summary = QLabel("尚未运行检查")
+        layout.addWidget(self.audit_summary)
+        self.audit_table = create_model_table(REPORT_HEADERS, [])
+        layout.addWidget(self.audit_table)
+
+        self.audit_conflicts = None
+        self.tabs.addTab(tab, "排课冲突")
+
+    def run_timetable_audit(self):
+        try:
+            self.audit_conflicts = run_audit()
+        except Exception as e:
+            QMessageBox.critical(self, "数据库错误", f"排课冲突检查失败：\n{e}")
+            return
+        self.audit_table.model().reset_rows(report_rows(self.audit_conflicts))
+        counts = summarize(self.audit_conflicts)
+        self.audit_summary.setText("，".join(f"{kind}冲突 {count} 处" for kind, count in counts.items()))
+
+    def export_timetable_audit(self):
+        if self.audit_conflicts is None:
+            QMessageBox.information(self, "提示", "请先运行排课冲突检查。")
+            return
+        try:
+            write_report(self.audit_conflicts, 'timetable_conflicts.csv')
+            QMessageBox.information(self, "成功", "冲突报告已导出到 timetable_conflicts.csv")
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败：\n{e}")
+
+    # --- 实时刷新部分 ---
+    def start_live_refresh(self):
+        """启动后台轮询变更源，将变化的行推送到已打开的表格"""
+        self.change_feed = open_change_feed()
+        self.change_poller = ChangePoller(self.change_feed, interval_ms=LIVE_REFRESH_INTERVAL_MS)
+        self.change_poller.changes_ready.connect(self.apply_changes)
+        self.change_poller.start()
+
+    def apply_changes(self, changes):
+        """按变更的行键只重新查询受影响的行；同一键以最后一次操作为准"""
+        if RELOAD_ALL in changes:
+            self.reload_live_tables()
+            return
+        grade_keys, grade_deleted = set(), set()
+        students, students_deleted, courses = set(), set(), set()
+        for table, op, key in changes:
+            if table == "Grade":
+                if op == "D":
+                    grade_keys.discard(key)
+                    grade_deleted.add(key)
+                else:
+                    grade_deleted.discard(key)
+                    grade_keys.add(key)
+            if table == "Student" and op == "D":
+                students_deleted.add(key)
+            else:
+                students.add(key[0])
+            if table in ("Grade", "StudentCourse"):
+                courses.add(key[1])
+
+        gpa_students = students
+        if self.user_type == "Student":
+            gpa_students = students & {self.student_id}
+
+        try:
+            if hasattr(self, "grade_table"):
+                model = self.grade_table.model()
+                model.remove_keys(grade_deleted)
+                for chunk in chunks(sorted(grade_keys), 1000):
+                    where = GRADE_KEYS_WHERE.format(", ".join(["(?, ?)"] * len(chunk)))
+                    params = [value for key in chunk for value in key]
+                    model.upsert_rows(db_query_all(GRADE_QUERY.format(where=where), params))
+
+            self.gpa_table.model().remove_keys(students_deleted)
+            self._refresh_rows(self.gpa_table, GPA_QUERY, GPA_STUDENTS_WHERE, gpa_students - {k[0] for k in students_deleted})
+            classes = self._changed_classes(students, students_deleted)
+            self._refresh_rows(self.class_table, CLASS_STATUS_QUERY, CLASS_IDS_WHERE, classes)
+            self._refresh_rows(self.course_table, COURSE_OVERVIEW_QUERY, COURSE_IDS_WHERE, courses)
+
+            if getattr(self, "analytics", None) is not None:
+                # 快照随每次轮询更新，报表只标记为过期，切换到标签页或报表时再重新计算
+                self.analytics.apply_changes(changes)
+                self.analytics_stale = True
+                self.analytics_status.setText("数据已变更，点击“刷新报表”更新")
+        except Exception as e:
+            print(f"增量刷新失败: {e}")
+
+    def _changed_classes(self, students, students_deleted):
+        """返回变更学生的原班级与现班级，并同步 StudentID -> ClassID 映射"""
+        classes = set()
+        for chunk in chunks(sorted(students), 1000):
+            where = STUDENT_IDS_WHERE.format(", ".join(["?"] * len(chunk)))
+            for student_id, class_id in db_query_all(STUDENT_CLASS_QUERY.format(where=where), chunk):
+                classes.add(self.student_classes.get(student_id))
+                classes.add(class_id)
+                self.student_classes[student_id] = class_id
+        for (student_id,) in students_deleted:
+            classes.add(self.student_classes.pop(student_id, None))
+        classes.discard(None)
+        return classes
+
+    def reload_live_tables(self):
+        """变更记录已超出保留期，无法逐行刷新时全量重新加载各表"""
+        self.load_class_status()
+        self.load_gpa_data()
+        self.load_course_overview()
+        if hasattr(self, "grade_table"):
+            if self.grade_table.model().dirty:
+                print("成绩表有未保存的修改，跳过全量重新加载")
+            else:
+                self.load_grade_data()
+        if getattr(self, "analytics", None) is not None:
+            if self.tabs.currentWidget() is self.analytics_tab:
+                self.reload_analytics()
+            else:
+                # 下次切换到统计分析标签页时再重新载入
+                self.analytics = None
+
+    def _refresh_rows(self, table, query, where_template, ids):
+        """以 IN 列表分批重新查询 ids 对应的行并写回表格"""
+        for chunk in chunks(sorted(ids), 1000):
+            where = where_template.format(", ".join(["?"] * len(chunk)))
+            table.model().upsert_rows(db_query_all(query.format(where=where), chunk))
+
+    def closeEvent(self, event):
+        self.change_poller.stop()
+        super().closeEvent(event)
+
     # --- 选课与导航部分 (已修改) ---
     def create_course_selection_tab(self):
         tab = QWidget()
@@ -238,8 +573,7 @@ class MainWindow(QMainWindow):
         self.course_combo = QComboBox()
         self.course_combo.setMinimumWidth(300)
         try:
-            rows = db_query_all("SELECT CourseID, CourseName FROM Course")
-            for row in rows:
+            for row in db_iter(COURSE_LIST_QUERY):
                 self.course_combo.addItem(f"{row[1]} ({row[0]})", row[0])
         except Exception as e:
             QMessageBox.critical(self, "数据库错误", f"加载课程失败：\n{e}")
@@ -267,44 +601,54 @@ class MainWindow(QMainWindow):
         self.enrolled_table.setColumnCount(len(headers))
         self.enrolled_table.setHorizontalHeaderLabels(headers)
         self.enrolled_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # "导航" 按钮由委托绘制，避免每行创建 QPushButton
+        self.nav_delegate = ButtonDelegate("📍 导航", "#2ecc71", self.enrolled_table)
+        self.nav_delegate.clicked.connect(self.on_nav_clicked)
+        self.enrolled_table.setItemDelegateForColumn(4, self.nav_delegate)
         layout.addWidget(self.enrolled_table)
         
         self.refresh_enrolled_courses()
         self.tabs.addTab(tab, "学生选课")
 
     def refresh_enrolled_courses(self):
+        """全量加载已选课程，仅在标签页创建时调用；选课后通过 append_enrolled_rows 增量追加"""
         if not self.student_id: return
         self.enrolled_table.setRowCount(0)
         try:
-            query = """
-                SELECT c.CourseName, cs.WeekDay, cs.StartTime, cs.EndTime, cr.Building, t.TeacherName
-                FROM StudentCourse sc 
-                INNER JOIN Course c ON sc.CourseID = c.CourseID
-                LEFT JOIN CourseSchedule cs ON c.CourseID = cs.CourseID
-                LEFT JOIN ClassRoom cr ON cs.ClassRoomID = cr.ClassRoomID
-                LEFT JOIN Teacher t ON cs.TeacherID = t.TeacherID
-                WHERE sc.StudentID = ?
-            """
-            rows = db_query_all(query, (self.student_id,))
-            self.enrolled_table.setRowCount(len(rows))
-            for i, row in enumerate(rows):
+            rows = db_query_all(ENROLLED_COURSES_QUERY, (self.student_id,))
+            self.append_enrolled_rows(rows)
+        except Exception as e:
+            print(f"刷新课程列表失败: {e}")
+
+    def append_enrolled_rows(self, rows):
+        """将查询结果追加到已选课程表末尾"""
+        table = self.enrolled_table
+        start_row = table.rowCount()
+        table.setUpdatesEnabled(False)
+        try:
+            table.setRowCount(start_row + len(rows))
+            for i, row in enumerate(rows, start_row):
                 course_name, day, start, end, building, teacher = row
                 time_str = f"{day} {start}-{end}" if day else "时间未定"
                 loc_str = f"{building}" if building else "地点未定"
                 teacher_str = str(teacher) if teacher else "未知"
-                
-                self.enrolled_table.setItem(i, 0, QTableWidgetItem(str(course_name)))
-                self.enrolled_table.setItem(i, 1, QTableWidgetItem(time_str))
-                self.enrolled_table.setItem(i, 2, QTableWidgetItem(loc_str))
-                self.enrolled_table.setItem(i, 3, QTableWidgetItem(teacher_str))
-                
-                nav_btn = QPushButton("📍 导航")
-                nav_btn.setStyleSheet("QPushButton { background-color: #2ecc71; color: white; border-radius: 4px; padding: 5px; }")
-                # 传递 building 字段给导航函数
-                nav_btn.clicked.connect(partial(self.navigate_to_classroom, building))
-                self.enrolled_table.setCellWidget(i, 4, nav_btn)
-        except Exception as e:
-            print(f"刷新课程列表失败: {e}")
+
+                table.setItem(i, 0, QTableWidgetItem(str(course_name)))
+                table.setItem(i, 1, QTableWidgetItem(time_str))
+                table.setItem(i, 2, QTableWidgetItem(loc_str))
+                table.setItem(i, 3, QTableWidgetItem(teacher_str))
+
+                # 操作列只保存 building 字段，由委托绘制按钮
+                nav_item = QTableWidgetItem()
+                nav_item.setData(Qt.UserRole, building)
+                nav_item.setFlags(nav_item.flags() & ~Qt.ItemIsEditable)
+                table.setItem(i, 4, nav_item)
+        finally:
+            table.setUpdatesEnabled(True)
+
+    def on_nav_clicked(self, index):
+        building = self.enrolled_table.item(index.row(), 4).data(Qt.UserRole)
+        self.navigate_to_classroom(building)
 
     def select_course(self):
         course_id = self.course_combo.currentData()
@@ -312,8 +656,8 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "错误", "无效的课程或学生ID。")
             return
         try:
-            max_students = db_query_one("SELECT MaxStudents FROM Course WHERE CourseID = ?", (course_id,))[0]
-            current_count = db_query_one("SELECT COUNT(*) FROM StudentCourse WHERE CourseID = ?", (course_id,))[0]
+            max_students = db_query_one(COURSE_MAX_STUDENTS_QUERY, (course_id,))[0]
+            current_count = db_query_one(COURSE_ENROLLED_COUNT_QUERY, (course_id,))[0]
             if current_count >= max_students:
                 QMessageBox.warning(self, "满员", "该课程已满！")
                 return
@@ -326,9 +670,15 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            db_execute("INSERT INTO StudentCourse (StudentID, CourseID) VALUES (?, ?)", (self.student_id, course_id))
+            # 插入与新课程行的查询在同一批次中完成，只把新课程的行追加到表格
+            new_rows = db_execute_returning(
+                "SET NOCOUNT ON; INSERT INTO StudentCourse (StudentID, CourseID) VALUES (?, ?);"
+                + ENROLLED_COURSES_QUERY + " AND sc.CourseID = ?",
+                (self.student_id, course_id, self.student_id, course_id)
+            )
             QMessageBox.information(self, "成功", "选课成功！")
-            self.refresh_enrolled_courses()
+            self.append_enrolled_rows(new_rows)
+            self.change_feed.record("StudentCourse", "I", (self.student_id, course_id))
         except Exception as e:
             if "unique" in str(e).lower():
                 QMessageBox.warning(self, "重复", "您已选此课程！")
@@ -337,14 +687,8 @@ class MainWindow(QMainWindow):
 
     def has_schedule_conflict(self, new_course_id):
         try:
-            new_schedules = db_query_all("SELECT WeekDay, StartTime, EndTime FROM CourseSchedule WHERE CourseID = ?", (new_course_id,))
-            existing_schedules = db_query_all(
-                """
-                SELECT cs.WeekDay, cs.StartTime, cs.EndTime
-                FROM StudentCourse sc INNER JOIN CourseSchedule cs ON sc.CourseID = cs.CourseID
-                WHERE sc.StudentID = ?
-                """, (self.student_id,)
-            )
+            new_schedules = db_query_all(COURSE_SCHEDULES_QUERY, (new_course_id,))
+            existing_schedules = db_query_all(STUDENT_SCHEDULES_QUERY, (self.student_id,))
             for new_day, new_start, new_end in new_schedules:
                 for ex_day, ex_start, ex_end in existing_schedules:
                     if new_day == ex_day and ((new_start < ex_end and new_end > ex_start) or (ex_start < new_end and ex_end > new_start)):
@@ -367,22 +711,16 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "错误", "无效的学生ID。")
             return
         try:
-            rows = db_query_all(
-                """
-                SELECT c.CourseName, cs.WeekDay, cs.StartTime, cs.EndTime, cr.Building, t.TeacherName
-                FROM StudentCourse sc INNER JOIN Course c ON sc.CourseID = c.CourseID
-                                      INNER JOIN CourseSchedule cs ON c.CourseID = cs.CourseID
-                                      INNER JOIN ClassRoom cr ON cs.ClassRoomID = cr.ClassRoomID
-                                      INNER JOIN Teacher t ON cs.TeacherID = t.TeacherID
-                WHERE sc.StudentID = ?
-                """, (self.student_id,)
-            )
-            if not rows:
+            # 逐批读取并写入 CSV，不在内存中保留完整结果集
+            rows = db_iter(EXPORT_SCHEDULE_QUERY, (self.student_id,))
+            first = next(rows, None)
+            if first is None:
                 QMessageBox.information(self, "提示", "没有课程数据可导出。")
                 return
             with open('schedule.csv', 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(["课程名", "星期", "开始时间", "结束时间", "教学楼", "教师"])
+                writer.writerow(first)
                 writer.writerows(rows)
             QMessageBox.information(self, "成功", "课程表已导出到 schedule.csv")
         except Exception as e:
@@ -0,0 +1,167 @@
+# File: table_index.py
+# Functionality: 为已加载到内存的表格数据建立索引（ID 列精确匹配、名称列前缀匹配、列排名数组），支持不回查数据库的快速筛选与多列排序
+
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from itertools import compress
+
+import numpy as np
+
+# 一次删除的行数少于此值时逐个删除键，否则整体按掩码重建键列表
+_DEL_ONE_BY_ONE = 64
+
+def _prefix_key(value):
+    return str(value).lower() if value is not None else ""
+
+def _exact_key(value):
+    return str(value).strip() if value is not None else ""
+
+def _mixed_key(value):
+    """数值与文本混在同一列时：数值在前按大小排序，其余按文本排序"""
+    if isinstance(value, (int, float, Decimal)):
+        return (0, value, "")
+    return (1, 0, str(value))
+
+def _sorted_index(keys):
+    """Returns (keys in ascending order, row ids in the same order); equal keys keep row order."""
+    if not keys:
+        return [], np.empty(0, dtype=np.int64)
+    arr = np.array(keys)
+    order = np.argsort(arr, kind="stable")
+    return arr[order].tolist(), order.astype(np.int64)
+
+def _merge(keys, ids, new_keys, new_ids):
+    """Merges a batch of keys into a sorted index with one list rebuild and one np.insert."""
+    order = sorted(range(len(new_keys)), key=new_keys.__getitem__)
+    new_keys = [new_keys[i] for i in order]
+    positions = [bisect_right(keys, k) for k in new_keys]
+    merged, prev = [], 0
+    for pos, k in zip(positions, new_keys):
+        merged.extend(keys[prev:pos])
+        merged.append(k)
+        prev = pos
+    merged.extend(keys[prev:])
+    return merged, np.insert(ids, positions, new_ids[order])
+
+def _move(keys, ids, i, old_k, new_k):
+    """Moves row i from old_k to new_k in a sorted index."""
+    lo = bisect_left(keys, old_k)
+    hi = bisect_right(keys, old_k, lo)
+    pos = lo + int(np.flatnonzero(ids[lo:hi] == i)[0])
+    del keys[pos]
+    ids = np.delete(ids, pos)
+    pos = bisect_left(keys, new_k)
+    keys.insert(pos, new_k)
+    return keys, np.insert(ids, pos, i)
+
+class TableIndex:
+    """Exact-match index on ID columns and prefix index on name columns, both kept as sorted key lists with numpy
+    row id arrays, plus lazily built rank arrays for sorting. Added or removed batches are merged with one array
+    operation per column instead of rebuilding the index."""
+
+    def __init__(self, rows, exact_columns=(), prefix_columns=()):
+        self.exact_columns = tuple(exact_columns)
+        self.prefix_columns = tuple(prefix_columns)
+        self.rebuild(rows)
+
+    def rebuild(self, rows):
+        self.rows = rows
+        self.exact = {c: _sorted_index([_exact_key(row[c]) for row in rows]) for c in self.exact_columns}
+        # 前缀索引：按小写名称排序的键数组与对应的行号数组
+        self.prefix = {c: _sorted_index([_prefix_key(row[c]) for row in rows]) for c in self.prefix_columns}
+        self._ranks = {}
+
+    def _indexes(self):
+        for c, entry in self.exact.items():
+            yield self.exact, c, entry, _exact_key
+        for c, entry in self.prefix.items():
+            yield self.prefix, c, entry, _prefix_key
+
+    def lookup_mask(self, text):
+        """Returns a bool array over all rows, True where text matches exactly on an ID column or as a prefix of a name column."""
+        key = text.strip()
+        mask = np.zeros(len(self.rows), dtype=bool)
+        for keys, ids in self.exact.values():
+            lo = bisect_left(keys, key)
+            hi = bisect_right(keys, key, lo)
+            if lo < hi:
+                mask[ids[lo:hi]] = True
+        prefix = key.lower()
+        for keys, ids in self.prefix.values():
+            lo = bisect_left(keys, prefix)
+            hi = bisect_left(keys, prefix + "\uffff", lo)
+            if lo < hi:
+                mask[ids[lo:hi]] = True
+        return mask
+
+    def filter_view(self, text, order=None):
+        """Returns the ids of rows matching text, in the given display order (a permutation of all ids) or ascending."""
+        mask = self.lookup_mask(text)
+        if order is None:
+            return np.flatnonzero(mask)
+        # 按排序后的顺序取掩码，结果即为显示顺序，无需再排序
+        return order[mask[order]]
+
+    def add_rows(self, start, rows):
+        """Indexes rows appended to self.rows at ids start, start + 1, ..."""
+        new_ids = np.arange(start, start + len(rows), dtype=np.int64)
+        for index, c, (keys, ids), key_func in list(self._indexes()):
+            index[c] = _merge(keys, ids, [key_func(row[c]) for row in rows], new_ids)
+        self._ranks = {}
+
+    def remove_rows(self, keep, rows):
+        """Drops the ids where keep is False and renumbers the rest; rows is the row list after the deletion."""
+        new_ids = np.cumsum(keep) - 1
+        for index, c, (keys, ids), _ in list(self._indexes()):
+            kept = keep[ids]
+            drop = np.flatnonzero(~kept)
+            if len(drop) < _DEL_ONE_BY_ONE:
+                for pos in drop[::-1]:
+                    del keys[int(pos)]
+            else:
+                keys = list(compress(keys, kept.tolist()))
+            index[c] = (keys, new_ids[ids[kept]])
+        # 排名只需保持相对大小，删除行后仍然有效
+        self._ranks = {c: ranks[keep] for c, ranks in self._ranks.items()}
+        self.rows = rows
+
+    def update_row(self, i, old_row, new_row):
+        for index, c, (keys, ids), key_func in list(self._indexes()):
+            old_k, new_k = key_func(old_row[c]), key_func(new_row[c])
+            if old_k != new_k:
+                index[c] = _move(keys, ids, i, old_k, new_k)
+        self._ranks = {}
+
+    def column_ranks(self, column):
+        """Returns an int rank per row for column; equal values share a rank so later sort keys can break ties."""
+        ranks = self._ranks.get(column)
+        if ranks is None:
+            values = [row[column] for row in self.rows]
+            # 空值排在最后；非空行按值排序时使用 C 层的 key 函数
+            order = [i for i, v in enumerate(values) if v is not None]
+            try:
+                order.sort(key=values.__getitem__)
+            except TypeError:
+                order.sort(key=lambda i: _mixed_key(values[i]))
+            order.extend(i for i, v in enumerate(values) if v is None)
+            rank_list = [0] * len(values)
+            rank, prev = -1, object()
+            for i in order:
+                if values[i] != prev:
+                    rank += 1
+                    prev = values[i]
+                rank_list[i] = rank
+            ranks = np.array(rank_list, dtype=np.int64)
+            self._ranks[column] = ranks
+        return ranks
+
+    def sort_order(self, sort_keys):
+        """Returns a permutation of all row ids ordered by sort_keys [(column, descending), ...], first key primary."""
+        if not sort_keys:
+            return np.arange(len(self.rows))
+        # lexsort 以最后一个键为主键且为稳定排序；降序取排名的相反数
+        keys = []
+        for column, descending in reversed(sort_keys):
+            ranks = self.column_ranks(column)
+            keys.append(-ranks if descending else ranks)
+        return np.lexsort(keys)
@@ -0,0 +1,100 @@
+# File: timetable_audit.py
+# Functionality: 全校排课冲突检查。按星期对教室、教师及每位选课学生分别做扫描线区间检测，输出冲突报告；可作为命令行工具单独运行
+
+import argparse
+import csv
+import heapq
+from collections import defaultdict, namedtuple
+
+from db_utils import db_iter
+
+KIND_CLASSROOM = "教室"
+KIND_TEACHER = "教师"
+KIND_STUDENT = "学生"
+
+REPORT_HEADERS = ["类型", "资源ID", "星期", "排课ID_A", "课程A", "排课ID_B", "课程B", "重叠开始", "重叠结束"]
+
+Schedule = namedtuple("Schedule", "schedule_id course_id teacher_id classroom_id weekday start end")
+Conflict = namedtuple("Conflict", "kind resource_id weekday first second overlap_start overlap_end")
+
+def find_overlaps(schedules):
+    """Sweep-line over the schedules of one resource on one day; yields (a, b, overlap_start, overlap_end) for every overlapping pair."""
+    active = []  # 按结束时间排列的小顶堆：(end, seq, schedule)
+    for seq, sch in enumerate(sorted(schedules, key=lambda s: (s.start, s.end))):
+        # 已在当前开始时间前结束的区间移出；首尾相接不算冲突
+        while active and active[0][0] <= sch.start:
+            heapq.heappop(active)
+        for end, _, other in active:
+            yield other, sch, sch.start, min(end, sch.end)
+        heapq.heappush(active, (sch.end, seq, sch))
+
+def audit_timetable(schedules, enrollments):
+    """Returns all classroom, teacher and student conflicts. enrollments is an iterable of (StudentID, CourseID)."""
+    groups = defaultdict(list)
+    by_course = defaultdict(list)
+    for sch in schedules:
+        if sch.classroom_id is not None:
+            groups[(KIND_CLASSROOM, sch.classroom_id, sch.weekday)].append(sch)
+        if sch.teacher_id is not None:
+            groups[(KIND_TEACHER, sch.teacher_id, sch.weekday)].append(sch)
+        by_course[sch.course_id].append(sch)
+    for student_id, course_id in enrollments:
+        for sch in by_course.get(course_id, ()):
+            groups[(KIND_STUDENT, student_id, sch.weekday)].append(sch)
+
+    conflicts = []
+    for (kind, resource_id, weekday), day_schedules in groups.items():
+        if len(day_schedules) < 2:
+            continue
+        for a, b, start, end in find_overlaps(day_schedules):
+            # 同一课程的多条排课对学生而言不算冲突
+            if kind == KIND_STUDENT and a.course_id == b.course_id:
+                continue
+            conflicts.append(Conflict(kind, resource_id, weekday, a, b, start, end))
+    conflicts.sort(key=lambda c: (c.kind, str(c.resource_id), c.weekday, c.overlap_start))
+    return conflicts
+
+def load_schedules():
+    rows = db_iter(
+        """
+        SELECT ScheduleID, CourseID, TeacherID, ClassRoomID, WeekDay, StartTime, EndTime
+        FROM CourseSchedule
+        WHERE WeekDay IS NOT NULL AND StartTime IS NOT NULL AND EndTime IS NOT NULL
+        """
+    )
+    return [Schedule(*row) for row in rows]
+
+def run_audit():
+    """Loads CourseSchedule and StudentCourse and returns the conflict list."""
+    return audit_timetable(load_schedules(), db_iter("SELECT StudentID, CourseID FROM StudentCourse"))
+
+def report_rows(conflicts):
+    return [
+        [c.kind, c.resource_id, c.weekday, c.first.schedule_id, c.first.course_id,
+         c.second.schedule_id, c.second.course_id, c.overlap_start, c.overlap_end]
+        for c in conflicts
+    ]
+
+def summarize(conflicts):
+    """Returns {kind: conflict count}."""
+    counts = defaultdict(int)
+    for c in conflicts:
+        counts[c.kind] += 1
+    return {kind: counts[kind] for kind in (KIND_CLASSROOM, KIND_TEACHER, KIND_STUDENT)}
+
+def write_report(conflicts, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_HEADERS)
+        writer.writerows(report_rows(conflicts))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="全校排课冲突检查")
+    parser.add_argument("-o", "--output", default="timetable_conflicts.csv", help="冲突报告 CSV 路径")
+    args = parser.parse_args()
+
+    conflicts = run_audit()
+    write_report(conflicts, args.output)
+    for kind, count in summarize(conflicts).items():
+        print(f"{kind}冲突: {count}")
+    print(f"报告已写入 {args.output}")
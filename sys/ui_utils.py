@@ -1,8 +1,17 @@
 # File: ui_utils.py
 # Functionality: 提供通用的用户界面元素与样式，确保整个应用程序的界面风格统一
 
-from PyQt5.QtWidgets import QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView
-from PyQt5.QtCore import Qt
+from decimal import Decimal, InvalidOperation
+from itertools import compress
+from operator import itemgetter
+
+import numpy as np
+from PyQt5.QtWidgets import (QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QStyledItemDelegate, QTableView, QMessageBox)
+from PyQt5.QtCore import Qt, QEvent, QModelIndex, QAbstractTableModel, QTimer, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor
+
+from table_index import TableIndex
 
 INPUT_STYLE = "padding: 8px 10px; border-radius: 6px; border: 1px solid #ccc; font-size: 14px;"
 
@@ -53,4 +62,383 @@ def create_table(headers, data, editable_columns=None):
             else:
                 qitem.setFlags(qitem.flags() & ~Qt.ItemIsEditable)
             table.setItem(i, j, qitem)
-    return table
\ No newline at end of file
+    return table
+
+def _edited_value(text, old):
+    """Converts editor text back to the type of the old cell value so numeric columns stay sortable.
+    Blank text becomes None; text that is not a finite number is kept so saving can report it."""
+    text = str(text).strip()
+    if not text:
+        return None
+    if isinstance(old, str):
+        return text
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        return text
+    if not value.is_finite():
+        return text
+    return float(value) if isinstance(old, float) else value
+
+class RowTableModel(QAbstractTableModel):
+    """Table model over a list of rows, indexed by key columns so single rows can be updated in place."""
+
+    def __init__(self, headers, data, key_columns=(0,), editable_columns=None, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.key_columns = tuple(key_columns)
+        self.editable_columns = set(editable_columns or [])
+        self.rows = [row if isinstance(row, list) else list(row) for row in data]
+        self.dirty = set()  # 已编辑但尚未保存的行号
+        self._rebuild_key_index()
+
+    def _rebuild_key_index(self):
+        # 键 -> 槽位，槽位 -> 当前行号；删除行时只需整体重映射 _slot_rows，不必重建字典
+        self.key_index = dict(zip(self._keys(self.rows), range(len(self.rows))))
+        self._slot_rows = np.arange(len(self.rows), dtype=np.int64)
+
+    def _keys(self, rows):
+        """Key tuples of rows, built without a Python-level loop."""
+        return zip(*(map(itemgetter(c), rows) for c in self.key_columns))
+
+    def row_key(self, row):
+        return tuple(row[c] for c in self.key_columns)
+
+    def row_of(self, key):
+        """Returns the row number holding key, or None."""
+        slot = self.key_index.get(key)
+        return None if slot is None else int(self._slot_rows[slot])
+
+    def source_row(self, row):
+        """Maps a displayed row number to an index into self.rows."""
+        return row
+
+    def cell_text(self, source_row, column):
+        value = self.rows[source_row][column]
+        return str(value).strip() if value is not None else ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        value = self.rows[self.source_row(index.row())][index.column()]
+        return str(value) if value is not None else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in self.editable_columns:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() not in self.editable_columns:
+            return False
+        row = self.source_row(index.row())
+        self.rows[row][index.column()] = _edited_value(value, self.rows[row][index.column()])
+        self.dirty.add(row)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def reset_rows(self, data):
+        """Replaces all rows."""
+        self.beginResetModel()
+        self.rows = [row if isinstance(row, list) else list(row) for row in data]
+        self.dirty.clear()
+        self._rebuild_key_index()
+        self.endResetModel()
+
+    def append_rows(self, data):
+        """Appends one batch of rows with a single insert notification, so a streamed load shows each batch as it arrives.
+        Rows whose key is already present (e.g. delivered by live refresh during the load) are skipped."""
+        rows = [row if isinstance(row, list) else list(row) for row in data]
+        rows = [row for row in rows if self.row_key(row) not in self.key_index]
+        if not rows:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._append_rows(rows)
+        self.endInsertRows()
+
+    def _split_upserts(self, data):
+        """Splits data into [(row number, row)] to replace and new rows to append. Rows with unsaved edits are skipped."""
+        updates, new_rows = [], []
+        for row in data:
+            row = list(row)
+            i = self.row_of(self.row_key(row))
+            if i is None:
+                new_rows.append(row)
+            elif i not in self.dirty and self.rows[i] != row:
+                updates.append((i, row))
+        return updates, new_rows
+
+    def _replace_row(self, i, row):
+        self.rows[i] = row
+
+    def _append_rows(self, rows):
+        start, first_slot = len(self.rows), len(self._slot_rows)
+        self.rows.extend(rows)
+        self.key_index.update(zip(self._keys(rows), range(first_slot, first_slot + len(rows))))
+        self._slot_rows = np.concatenate([self._slot_rows, np.arange(start, len(self.rows), dtype=np.int64)])
+
+    def upsert_rows(self, data):
+        """Updates rows whose key already exists and appends the rest."""
+        updates, new_rows = self._split_upserts(data)
+        last_col = len(self.headers) - 1
+        for i, row in updates:
+            self._replace_row(i, row)
+            self.dataChanged.emit(self.index(i, 0), self.index(i, last_col))
+        if new_rows:
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(new_rows) - 1)
+            self._append_rows(new_rows)
+            self.endInsertRows()
+
+    def _forget_keys(self, keys):
+        """Drops keys from the key index and renumbers the remaining slots and dirty rows.
+        Returns (keep mask over the old rows, new row number per old row), or None when no key was present."""
+        removed = []
+        for key in keys:
+            slot = self.key_index.pop(key, None)
+            if slot is not None:
+                removed.append(int(self._slot_rows[slot]))
+                self._slot_rows[slot] = -1
+        if not removed:
+            return None
+        keep = np.ones(len(self.rows), dtype=bool)
+        keep[removed] = False
+        new_ids = np.cumsum(keep) - 1
+        live = self._slot_rows >= 0
+        self._slot_rows[live] = new_ids[self._slot_rows[live]]
+        self.dirty = {int(new_ids[d]) for d in self.dirty if keep[d]}
+        return keep, new_ids
+
+    def remove_keys(self, keys):
+        """Removes the rows with the given keys."""
+        forgotten = self._forget_keys(keys)
+        if forgotten is None:
+            return
+        keep, _ = forgotten
+        for i in np.flatnonzero(~keep)[::-1]:
+            i = int(i)
+            self.beginRemoveRows(QModelIndex(), i, i)
+            del self.rows[i]
+            self.endRemoveRows()
+
+class IndexedTableModel(RowTableModel):
+    """RowTableModel that filters and sorts through a TableIndex, without re-querying the database."""
+    MAX_SORT_KEYS = 3
+
+    def __init__(self, headers, data, key_columns=(0,), editable_columns=None,
+                 exact_columns=(), prefix_columns=(), parent=None):
+        super().__init__(headers, [], key_columns, editable_columns, parent)
+        self.table_index = TableIndex([], exact_columns, prefix_columns)
+        self.resident = True  # False 表示数据未全部载入内存，筛选需交给数据库
+        self.filter_text = ""
+        self.sort_keys = []   # [(列号, 是否降序)]，第一个为主排序键
+        self.view = None      # 当前显示的源行号数组，None 表示按原顺序显示全部
+        self.loading = False  # 分批载入期间不维护索引，筛选与排序在 finish_loading() 后生效
+        self._sorted = None
+        self.reset_rows(data)
+
+    def source_row(self, row):
+        return int(self.view[row]) if self.view is not None else row
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.view) if self.view is not None else len(self.rows)
+
+    def _compute_view(self):
+        if self.loading:
+            return None
+        if self.sort_keys and self._sorted is None:
+            self._sorted = self.table_index.sort_order(self.sort_keys)
+        if not self.filter_text:
+            return self._sorted if self.sort_keys else None
+        return self.table_index.filter_view(self.filter_text, self._sorted if self.sort_keys else None)
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter_text = text.strip()
+        self.view = self._compute_view()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Makes column the primary sort key; previous keys are kept as tie-breakers."""
+        self.beginResetModel()
+        if column < 0:
+            self.sort_keys = []
+        else:
+            keys = [k for k in self.sort_keys if k[0] != column]
+            self.sort_keys = [(column, order == Qt.DescendingOrder)] + keys[:self.MAX_SORT_KEYS - 1]
+        self._sorted = None
+        self.view = self._compute_view()
+        self.endResetModel()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        row = self.source_row(index.row())
+        old = list(self.rows[row])
+        if not super().setData(index, value, role):
+            return False
+        if not self.loading:
+            self.table_index.update_row(row, old, self.rows[row])
+        return True
+
+    def begin_loading(self):
+        """Clears the rows before batches arrive through append_rows(); the index is built once by finish_loading()."""
+        self.reset_rows([])
+        self.loading = True
+
+    def finish_loading(self):
+        self.beginResetModel()
+        self.loading = False
+        self.table_index.rebuild(self.rows)
+        self._sorted = None
+        self.view = self._compute_view()
+        self.endResetModel()
+
+    def reset_rows(self, data):
+        self.beginResetModel()
+        self.rows = [row if isinstance(row, list) else list(row) for row in data]
+        self.dirty.clear()
+        self._rebuild_key_index()
+        self.table_index.rebuild(self.rows)
+        self._sorted = None
+        self.view = self._compute_view()
+        self.endResetModel()
+
+    def _replace_row(self, i, row):
+        if not self.loading:
+            self.table_index.update_row(i, self.rows[i], row)
+        super()._replace_row(i, row)
+
+    def _append_rows(self, rows):
+        start = len(self.rows)
+        super()._append_rows(rows)
+        if self.loading:
+            return
+        self.table_index.add_rows(start, rows)
+        # 增量到达的行排在末尾，直到下一次点击表头重新排序
+        if self._sorted is not None:
+            self._sorted = np.concatenate([self._sorted, np.arange(start, len(self.rows))])
+
+    def append_rows(self, data):
+        if self.view is None:
+            super().append_rows(data)
+            return
+        # 已筛选或排序时新行的显示位置由视图决定，按 upsert 整体刷新
+        self.upsert_rows([row for row in data if self.row_key(row) not in self.key_index])
+
+    def upsert_rows(self, data):
+        if self.view is None:
+            super().upsert_rows(data)
+            return
+        updates, new_rows = self._split_upserts(data)
+        if not updates and not new_rows:
+            return
+        self.beginResetModel()
+        for i, row in updates:
+            self._replace_row(i, row)
+        if new_rows:
+            self._append_rows(new_rows)
+        self.view = self._compute_view()
+        self.endResetModel()
+
+    def remove_keys(self, keys):
+        forgotten = self._forget_keys(keys)
+        if forgotten is None:
+            return
+        keep, new_ids = forgotten
+        self.beginResetModel()
+        self.rows = list(compress(self.rows, keep.tolist()))
+        # 载入期间索引尚未建立，由 finish_loading() 统一重建
+        if not self.loading:
+            self.table_index.remove_rows(keep, self.rows)
+        if self._sorted is not None:
+            self._sorted = new_ids[self._sorted[keep[self._sorted]]]
+        self.view = self._compute_view()
+        self.endResetModel()
+
+def create_model_table(headers, data, key_columns=(0,), editable_columns=None):
+    """Creates a QTableView backed by a RowTableModel, for tables that are refreshed row by row."""
+    view = QTableView()
+    view.setModel(RowTableModel(headers, data, key_columns, editable_columns, view))
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    return view
+
+def create_indexed_table(headers, data, key_columns=(0,), editable_columns=None, exact_columns=(), prefix_columns=()):
+    """Creates a sortable QTableView backed by an IndexedTableModel."""
+    view = QTableView()
+    view.setModel(IndexedTableModel(headers, data, key_columns, editable_columns, exact_columns, prefix_columns, view))
+    header = view.horizontalHeader()
+    header.setSectionResizeMode(QHeaderView.Stretch)
+    # 初始不排序，避免启动时为整表建立排名数组
+    header.setSortIndicator(-1, Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+    return view
+
+def create_filter_bar(view, placeholder, sql_filter=None):
+    """Creates a QLineEdit that filters an IndexedTableModel on each keystroke.
+    When the model is not fully resident, sql_filter(text) -> rows is called instead after a short pause."""
+    edit = styled_line_edit()
+    edit.setPlaceholderText(placeholder)
+    model = view.model()
+    sql_timer = QTimer(edit)
+    sql_timer.setSingleShot(True)
+    sql_timer.setInterval(300)
+
+    def run_sql_filter():
+        # 数据库筛选会替换全部行，不能丢弃尚未保存的修改
+        if model.dirty:
+            QMessageBox.warning(edit, "提示", "有未保存的修改，请先保存后再筛选。")
+            return
+        model.reset_rows(sql_filter(edit.text().strip()))
+
+    sql_timer.timeout.connect(run_sql_filter)
+
+    def on_text_changed(text):
+        # 分批载入期间筛选文本先记下，载入完成后在内存中生效
+        if model.resident or model.loading or sql_filter is None:
+            model.set_filter(text)
+        else:
+            sql_timer.start()
+
+    edit.textChanged.connect(on_text_changed)
+    return edit
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Draws a button-like cell and emits clicked(index) on left click, without creating per-row widgets."""
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, text, color="#2ecc71", parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.color = QColor(color)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = option.rect.adjusted(4, 3, -4, -3)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.color)
+        painter.drawRoundedRect(rect, 4, 4)
+        painter.setPen(Qt.white)
+        painter.drawText(rect, Qt.AlignCenter, self.text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if option.rect.contains(event.pos()):
+                self.clicked.emit(index)
+                return True
+        return super().editorEvent(event, model, option, index)